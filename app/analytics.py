@@ -0,0 +1,124 @@
+from __future__ import annotations
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from .calendars import current
+from .models import Event
+
+def _grown(a: np.ndarray, rows: int, cols: int) -> np.ndarray:
+    """Return a (possibly reallocated) array with at least rows x cols capacity."""
+    if rows <= a.shape[0] and cols <= a.shape[1]:
+        return a
+    # Grow geometrically so adding names one by one stays amortized O(1)
+    out = np.zeros((max(rows, 2 * a.shape[0], 8), max(cols, 2 * a.shape[1], 8)), dtype=a.dtype)
+    out[: a.shape[0], : a.shape[1]] = a
+    return out
+
+class RelationshipStats:
+    """
+    Character co-occurrence, character x place presence and first/last
+    appearance, maintained incrementally from event edits.
+
+    Characters and places get a fixed row/column when first seen; the count
+    matrices are preallocated NumPy arrays of which only the leading
+    len(characters) x len(places) block is in use. The diagonal of the
+    co-occurrence matrix is the number of events each character appears in.
+    """
+    def __init__(self, events: Iterable[Event] = ()):
+        self.characters: Dict[str, int] = {}
+        self.places: Dict[str, int] = {}
+        self._co = np.zeros((0, 0), dtype=np.int32)
+        self._presence = np.zeros((0, 0), dtype=np.int32)
+        # Per character: multiset of days it appears at, so removals only rescan that character
+        self._starts: List[Counter] = []
+        self._ends: List[Counter] = []
+        # First/last appearance as calendar day numbers (None if never dated)
+        self.first: List[Optional[int]] = []
+        self.last: List[Optional[int]] = []
+        events = list(events)
+        cal = current()
+        starts, has_start = cal.parse_many(ev.start_date for ev in events)
+        ends, has_end = cal.parse_many(ev.end_date for ev in events)
+        for ev, s, ok, e, has_e in zip(events, starts.tolist(), has_start.tolist(), ends.tolist(), has_end.tolist()):
+            self._apply(ev, 1, (s, e if has_e and e >= s else s) if ok else None)
+
+    def _char_row(self, name: str) -> int:
+        row = self.characters.get(name)
+        if row is None:
+            row = self.characters[name] = len(self.characters)
+            n = len(self.characters)
+            self._co = _grown(self._co, n, n)
+            self._presence = _grown(self._presence, n, self._presence.shape[1])
+            self._starts.append(Counter())
+            self._ends.append(Counter())
+            self.first.append(None)
+            self.last.append(None)
+        return row
+
+    def _place_col(self, name: str) -> int:
+        col = self.places.get(name)
+        if col is None:
+            col = self.places[name] = len(self.places)
+            self._presence = _grown(self._presence, self._presence.shape[0], len(self.places))
+        return col
+
+    def _apply(self, ev: Event, sign: int, days: Optional[Tuple[int, int]] = None):
+        rows = np.array([self._char_row(n) for n in dict.fromkeys(ev.characters)], dtype=np.intp)
+        cols = np.array([self._place_col(n) for n in dict.fromkeys(ev.places)], dtype=np.intp)
+        if rows.size:
+            self._co[np.ix_(rows, rows)] += sign
+            if cols.size:
+                self._presence[np.ix_(rows, cols)] += sign
+        if days is None:
+            days = self._days(ev)
+            if days is None:
+                return
+        start, end = days
+        for row in rows:
+            starts, ends = self._starts[row], self._ends[row]
+            starts[start] += sign
+            ends[end] += sign
+            if sign > 0:
+                if self.first[row] is None or start < self.first[row]:
+                    self.first[row] = start
+                if self.last[row] is None or end > self.last[row]:
+                    self.last[row] = end
+                continue
+            if starts[start] <= 0:
+                del starts[start]
+                if start == self.first[row]:
+                    self.first[row] = min(starts, default=None)
+            if ends[end] <= 0:
+                del ends[end]
+                if end == self.last[row]:
+                    self.last[row] = max(ends, default=None)
+
+    @staticmethod
+    def _days(ev: Event) -> Optional[Tuple[int, int]]:
+        cal = current()
+        start = cal.parse(ev.start_date)
+        if start is None:
+            return None
+        end = cal.parse(ev.end_date)
+        return start, end if end is not None and end >= start else start
+
+    def update(self, before: Optional[Event], after: Optional[Event]):
+        """Account for one event being added (before=None), removed (after=None) or edited."""
+        if before is not None:
+            self._apply(before, -1)
+        if after is not None:
+            self._apply(after, +1)
+
+    def co_occurrence(self) -> Tuple[List[str], np.ndarray]:
+        """Character names and the (n x n) co-occurrence counts, as a view."""
+        n = len(self.characters)
+        return list(self.characters), self._co[:n, :n]
+
+    def presence(self) -> Tuple[List[str], List[str], np.ndarray]:
+        """Character names, place names and the events-per-(character, place) counts."""
+        n, m = len(self.characters), len(self.places)
+        return list(self.characters), list(self.places), self._presence[:n, :m]
+
+    def appearances(self, name: str) -> int:
+        row = self.characters.get(name)
+        return 0 if row is None else int(self._co[row, row])
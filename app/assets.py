@@ -0,0 +1,234 @@
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from .storage import file_lock
+
+ASSETS_DIR = Path("pictures") / "assets"
+REF_PREFIX = "sha256:"
+
+def file_hash(path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def is_ref(image: str) -> bool:
+    return image.startswith(REF_PREFIX)
+
+class AssetStore:
+    """
+    Content-addressed image store. Files are stored once under their SHA-256
+    (pictures/assets/ab/abcdef….png) and entities refer to them as 'sha256:<hex>'.
+    Reference counts (which entity uses which asset) are kept in memory and
+    updated as entities change; unreferenced files can be garbage collected.
+
+    Several windows share the store, so index.json is only changed under
+    storage.file_lock(), after reading it again, and looked up again when a
+    ref is missing from the copy in memory.
+    """
+    def __init__(self, root: Path = ASSETS_DIR):
+        self.root = Path(root)
+        self.index_file = self.root / "index.json"
+        # hash -> {"file": path relative to root, "size": bytes, "names": original file names,
+        #          "legacy": the old 'pictures/…' paths migrate() imported it from}
+        self.index: Dict[str, Dict[str, Any]] = {}
+        self._index_mtime: Optional[int] = None
+        self._load_index()
+        # hash -> owners ('characters:mikael', ...)
+        self.refs: Dict[str, Set[str]] = {}
+
+    def _load_index(self, force: bool = False):
+        """Read index.json again if another window replaced it (or always, with force)."""
+        try:
+            mtime = self.index_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._index_mtime and not force:
+            return
+        try:
+            self.index = json.loads(self.index_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return  # keep what we have; the next write replaces the damaged file
+        self._index_mtime = mtime
+
+    def _save_index(self):
+        # The caller holds file_lock() and loaded the index under it, so no other window's entries are lost
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_file.with_name(self.index_file.name + ".tmp")
+        tmp.write_text(json.dumps(self.index, indent=2, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.index_file)
+        self._index_mtime = self.index_file.stat().st_mtime_ns
+
+    def _entry(self, digest: str) -> Optional[Dict[str, Any]]:
+        entry = self.index.get(digest)
+        if entry is None:
+            self._load_index()  # e.g. a ref that came in with another window's save
+            entry = self.index.get(digest)
+        return entry
+
+    def import_file(self, path, legacy: bool = False) -> str:
+        """
+        Add a file to the store (or reuse the identical one already there) and
+        return its ref. With legacy, path is an old 'pictures/…' entry being
+        migrated; it's noted so garbage collection can remove the original.
+        """
+        path = Path(path)
+        digest = file_hash(path)
+        with file_lock():
+            self._load_index(force=True)
+            entry = self.index.get(digest)
+            stored = self.root / entry["file"] if entry is not None else None
+            if stored is None or not stored.exists():
+                rel = Path(digest[:2]) / (digest + path.suffix.lower())
+                (self.root / rel).parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(path, self.root / rel)
+                entry = self.index[digest] = {"file": rel.as_posix(), "size": path.stat().st_size, "names": []}
+            else:
+                os.utime(stored)  # counts as new for collect_garbage until the next save
+            if path.name not in entry["names"]:
+                entry["names"].append(path.name)
+            if legacy and path.as_posix() not in entry.setdefault("legacy", []):
+                entry["legacy"].append(path.as_posix())
+            self._save_index()
+        return REF_PREFIX + digest
+
+    def path(self, image: str) -> Optional[Path]:
+        """Filesystem path for an image entry: an asset ref or a legacy relative path."""
+        if not is_ref(image):
+            return Path(image)
+        entry = self._entry(image[len(REF_PREFIX):])
+        return self.root / entry["file"] if entry else None
+
+    def display_name(self, image: str) -> str:
+        if not is_ref(image):
+            return os.path.basename(image)
+        entry = self._entry(image[len(REF_PREFIX):])
+        return entry["names"][0] if entry and entry["names"] else image[len(REF_PREFIX):][:12]
+
+    def set_refs(self, owner: str, before: Iterable[str], after: Iterable[str]):
+        """Move owner's references from the images in before to those in after."""
+        old = {i[len(REF_PREFIX):] for i in before if is_ref(i)}
+        new = {i[len(REF_PREFIX):] for i in after if is_ref(i)}
+        for digest in old - new:
+            owners = self.refs.get(digest)
+            if owners is not None:
+                owners.discard(owner)
+                if not owners:
+                    del self.refs[digest]
+        for digest in new - old:
+            self.refs.setdefault(digest, set()).add(owner)
+
+    def rebuild_refs(self, state: Dict[str, List[Dict[str, Any]]]):
+        self.refs = {}
+        for coll in ("characters", "places", "events"):
+            for rec in state.get(coll, []):
+                owner = f"{coll}:{rec.get('name') or rec.get('title', '')}"
+                self.set_refs(owner, (), rec.get("images", []))
+
+    def migrate(self, state: Dict[str, List[Dict[str, Any]]]) -> int:
+        """Import legacy 'pictures/…' paths that still exist and replace them by refs."""
+        count = 0
+        for coll in ("characters", "places", "events"):
+            for rec in state.get(coll, []):
+                images = []
+                for image in rec.get("images", []):
+                    if not is_ref(image) and os.path.isfile(image):
+                        image = self.import_file(image, legacy=True)
+                        count += 1
+                    images.append(image)
+                rec["images"] = images
+        return count
+
+    def _stored(self) -> Dict[str, Path]:
+        """Hash -> file of everything stored, including files whose index entry was lost by an unlocked write."""
+        files = {digest: self.root / entry["file"] for digest, entry in self.index.items()}
+        for path in self.root.glob("??/*"):
+            files.setdefault(path.stem, path)
+        return files
+
+    def unreferenced(self, live: Iterable[str] = (), since: Optional[float] = None) -> Dict[str, Path]:
+        """
+        Hash -> file of the stored images that neither this session's entities
+        nor the refs in live (e.g. records saved by other windows, undo history)
+        use. Files added or reused after since (a timestamp) are kept too: they
+        may be in another window's unsaved form.
+        """
+        keep = set(self.refs) | {i[len(REF_PREFIX):] for i in live if is_ref(i)}
+        unused = {}
+        for digest, path in self._stored().items():
+            try:
+                if digest in keep or (since is not None and path.stat().st_mtime > since):
+                    continue
+            except FileNotFoundError:
+                pass  # only an index entry left
+            unused[digest] = path
+        return unused
+
+    def legacy_originals(self, live: Iterable[str] = ()) -> List[Path]:
+        """
+        The old 'pictures/…' files migrate() imported that no record in live
+        refers to by path any more (i.e. once the migrated records are saved).
+        Only files still holding the imported picture count: the store has
+        their content, so nothing is lost by removing them.
+        """
+        paths = {Path(i).as_posix() for i in live if not is_ref(i)}
+        originals = []
+        for digest, entry in self.index.items():
+            for name in entry.get("legacy", ()):
+                path = Path(name)
+                try:
+                    if name not in paths and path.is_file() and file_hash(path) == digest:
+                        originals.append(path)
+                except OSError:
+                    pass
+        return originals
+
+    def collect_garbage(self, live: Iterable[str] = (), since: Optional[float] = None) -> Tuple[int, int]:
+        """
+        Delete the files unreferenced(live, since) and legacy_originals(live)
+        find. Returns (files removed, bytes freed). The caller is expected to
+        hold file_lock(), so that live and the index can't change meanwhile.
+        """
+        self._load_index(force=True)
+        live = list(live)
+        removed = freed = 0
+        for path in self.legacy_originals(live):
+            try:
+                size = path.stat().st_size
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            removed += 1
+            freed += size
+        for entry in self.index.values():
+            if "legacy" in entry:
+                entry["legacy"] = [name for name in entry["legacy"] if Path(name).is_file()]
+                if not entry["legacy"]:
+                    del entry["legacy"]
+        for digest, path in self.unreferenced(live, since).items():
+            self.index.pop(digest, None)
+            try:
+                size = path.stat().st_size
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            try:
+                path.parent.rmdir()  # drop the fan-out directory once it's empty
+            except OSError:
+                pass
+            removed += 1
+            freed += size
+        self._save_index()
+        return removed, freed
+
+_default_store: Optional[AssetStore] = None
+
+def default_store() -> AssetStore:
+    global _default_store
+    if _default_store is None:
+        _default_store = AssetStore()
+    return _default_store
@@ -0,0 +1,245 @@
+from __future__ import annotations
+import re
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+
+# 'YYYY-MM-DD', 'YYYY-MM' or 'YYYY'; years may be negative (astronomical numbering) or longer than 4 digits,
+# months and days longer than 2 (custom calendars may have more than 99 of either)
+_DATE_RE = re.compile(r"\s*(-?\d+)(?:-(\d+))?(?:-(\d+))?\s*")
+
+class Calendar:
+    """
+    Converts dates to and from a single integer day number, so dates can be
+    sorted, compared and subtracted as plain ints. Subclasses provide the
+    month tables; parsing, formatting and bulk conversion are shared.
+    """
+    name = ""
+
+    def month_lengths(self, year: int) -> Sequence[int]:
+        raise NotImplementedError
+
+    def to_days(self, year: int, month: int, day: int) -> int:
+        raise NotImplementedError
+
+    def from_days(self, days: int) -> Tuple[int, int, int]:
+        raise NotImplementedError
+
+    def _days_many(self, years: np.ndarray, months: np.ndarray, days: np.ndarray) -> np.ndarray:
+        return np.array([self.to_days(int(y), int(m), int(d)) for y, m, d in zip(years, months, days)], dtype=np.int64)
+
+    def valid(self, year: int, month: int, day: int) -> bool:
+        lengths = self.month_lengths(year)
+        return 1 <= month <= len(lengths) and 1 <= day <= lengths[month - 1]
+
+    def period(self, text: str) -> Optional[Tuple[int, int]]:
+        """First and last day of a year, month or single date written as text; None if invalid."""
+        m = _DATE_RE.fullmatch(text or "")
+        if not m:
+            return None
+        year = int(m.group(1))
+        lengths = self.month_lengths(year)
+        if m.group(2) is None:
+            return self.to_days(year, 1, 1), self.to_days(year, len(lengths), lengths[-1])
+        month = int(m.group(2))
+        if not 1 <= month <= len(lengths):
+            return None
+        if m.group(3) is None:
+            return self.to_days(year, month, 1), self.to_days(year, month, lengths[month - 1])
+        day = int(m.group(3))
+        if not self.valid(year, month, day):
+            return None
+        n = self.to_days(year, month, day)
+        return n, n
+
+    def parse(self, text: str) -> Optional[int]:
+        """Day number of a full 'YYYY-MM-DD' date, or None if empty/invalid."""
+        m = _DATE_RE.fullmatch(text or "")
+        if not m or m.group(3) is None:
+            return None
+        year, month, day = int(m.group(1)), int(m.group(2)), int(m.group(3))
+        return self.to_days(year, month, day) if self.valid(year, month, day) else None
+
+    def parse_many(self, texts: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Bulk version of parse: (day numbers, validity mask). Plain 'YYYY-MM-DD'
+        strings are split as a character array in one go; anything else
+        (negative or long years, single- or three-digit parts) goes through the regex.
+        """
+        texts = list(texts)
+        n = len(texts)
+        years = np.zeros(n, dtype=np.int64)
+        months = np.zeros(n, dtype=np.int64)
+        days = np.zeros(n, dtype=np.int64)
+        ok = np.zeros(n, dtype=bool)
+        lens = np.fromiter(map(len, texts), dtype=np.int64, count=n)
+        fixed = lens == 10
+        if fixed.any():
+            chars = np.array([t for t, f in zip(texts, fixed) if f], dtype="U10").view(np.uint32).reshape(-1, 10)
+            digits = chars.astype(np.int64) - ord("0")
+            shape_ok = (chars[:, 4] == ord("-")) & (chars[:, 7] == ord("-"))
+            shape_ok &= ((digits[:, [0, 1, 2, 3, 5, 6, 8, 9]] >= 0) & (digits[:, [0, 1, 2, 3, 5, 6, 8, 9]] <= 9)).all(axis=1)
+            idx = np.flatnonzero(fixed)
+            years[idx] = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+            months[idx] = digits[:, 5] * 10 + digits[:, 6]
+            days[idx] = digits[:, 8] * 10 + digits[:, 9]
+            ok[idx] = shape_ok
+        for i in np.flatnonzero(~ok & (lens > 0)):
+            m = _DATE_RE.fullmatch(texts[i])
+            if m and m.group(3) is not None:
+                years[i], months[i], days[i] = int(m.group(1)), int(m.group(2)), int(m.group(3))
+                ok[i] = True
+        ok[ok] &= self._valid_many(years[ok], months[ok], days[ok])
+        out = np.zeros(n, dtype=np.int64)
+        if ok.any():
+            out[ok] = self._days_many(years[ok], months[ok], days[ok])
+        return out, ok
+
+    def _valid_many(self, years: np.ndarray, months: np.ndarray, days: np.ndarray) -> np.ndarray:
+        return np.array([self.valid(int(y), int(m), int(d)) for y, m, d in zip(years, months, days)], dtype=bool)
+
+    def format(self, days: int) -> str:
+        """Storage form, 'YYYY-MM-DD' (e.g. '-0043-03-15' for 44 BCE)."""
+        y, m, d = self.from_days(days)
+        return f"{'-' if y < 0 else ''}{abs(y):04d}-{m:02d}-{d:02d}"
+
+    def label(self, days: int) -> str:
+        """Human-readable form for the UI."""
+        return self.format(days)
+
+    def year_label(self, year: int) -> str:
+        return str(year)
+
+    def spec(self) -> Dict[str, Any]:
+        return {"type": self.name}
+
+class GregorianCalendar(Calendar):
+    """
+    Proleptic Gregorian calendar with astronomical year numbering (year 0 is
+    1 BCE, -1 is 2 BCE, ...). Day 1 is 0001-01-01, as in date.toordinal().
+
+    Conversions use precomputed tables for one 400-year cycle (146097 days),
+    so they are a divmod and two lookups instead of year-by-year arithmetic.
+    """
+    name = "gregorian"
+    CYCLE_DAYS = 146097
+    _NORMAL = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+    _LEAP = (31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+    # Cycle day 0 is Jan 1 of year 0 (mod 400), 366 days before 0001-01-01; this makes 0001-01-01 day 1
+    _EPOCH_SHIFT = 365
+
+    def __init__(self):
+        self._is_leap = np.array([(y % 4 == 0 and y % 100 != 0) or y % 400 == 0 for y in range(400)])
+        year_len = np.where(self._is_leap, 366, 365)
+        self._year_start = np.concatenate([[0], np.cumsum(year_len)[:-1]]).astype(np.int64)
+        self._year_start_list = self._year_start.tolist()
+        self._month_start = np.array(
+            [np.concatenate([[0], np.cumsum(t)[:-1]]) for t in (self._NORMAL, self._LEAP)], dtype=np.int64
+        )
+        self._month_start_list = self._month_start.tolist()
+        self._month_len = np.array([self._NORMAL, self._LEAP], dtype=np.int64)
+
+    def month_lengths(self, year):
+        return self._LEAP if self._is_leap[year % 400] else self._NORMAL
+
+    def to_days(self, year, month, day):
+        q, r = divmod(year, 400)
+        leap = int(self._is_leap[r])
+        return (q * self.CYCLE_DAYS + self._year_start_list[r] + self._month_start_list[leap][month - 1]
+                + day - 1 - self._EPOCH_SHIFT)
+
+    def from_days(self, days):
+        q, r = divmod(days + self._EPOCH_SHIFT, self.CYCLE_DAYS)
+        yr = bisect_right(self._year_start_list, r) - 1
+        doy = r - self._year_start_list[yr]
+        starts = self._month_start_list[int(self._is_leap[yr])]
+        month = bisect_right(starts, doy)
+        return q * 400 + yr, month, doy - starts[month - 1] + 1
+
+    def _days_many(self, years, months, days):
+        q, r = np.divmod(years, 400)
+        leap = self._is_leap[r].astype(np.intp)
+        return q * self.CYCLE_DAYS + self._year_start[r] + self._month_start[leap, months - 1] + days - 1 - self._EPOCH_SHIFT
+
+    def _valid_many(self, years, months, days):
+        ok = (months >= 1) & (months <= 12) & (days >= 1)
+        leap = self._is_leap[np.mod(years, 400)].astype(np.intp)
+        ok[ok] &= days[ok] <= self._month_len[leap[ok], months[ok] - 1]
+        return ok
+
+    def label(self, days):
+        y, m, d = self.from_days(days)
+        return f"{y:04d}-{m:02d}-{d:02d}" if y > 0 else f"{m:02d}-{d:02d} {1 - y} BCE"
+
+    def year_label(self, year):
+        return str(year) if year > 0 else f"{1 - year} BCE"
+
+class CustomCalendar(Calendar):
+    """
+    User-defined calendar with fixed month lengths (no leap years) and optional
+    eras. Year 0 starts at day 0; eras only affect how dates are labelled.
+    """
+    name = "custom"
+
+    def __init__(self, months: List[Tuple[str, int]], eras: List[Tuple[str, int]] = ()):
+        if not months or any(n <= 0 for _, n in months):
+            raise ValueError("a calendar needs at least one month, each with a positive number of days")
+        self.months = [(str(name), int(n)) for name, n in months]
+        self.eras = sorted(((str(name), int(start)) for name, start in eras), key=lambda e: e[1])
+        self._lengths = [n for _, n in self.months]
+        self._starts = np.concatenate([[0], np.cumsum(self._lengths)[:-1]]).astype(np.int64)
+        self._starts_list = self._starts.tolist()
+        self._lengths_arr = np.array(self._lengths, dtype=np.int64)
+        self.year_days = sum(self._lengths)
+
+    def month_lengths(self, year):
+        return self._lengths
+
+    def to_days(self, year, month, day):
+        return year * self.year_days + self._starts_list[month - 1] + day - 1
+
+    def from_days(self, days):
+        year, doy = divmod(days, self.year_days)
+        month = bisect_right(self._starts_list, doy)
+        return year, month, doy - self._starts_list[month - 1] + 1
+
+    def _days_many(self, years, months, days):
+        return years * self.year_days + self._starts[months - 1] + days - 1
+
+    def _valid_many(self, years, months, days):
+        ok = (months >= 1) & (months <= len(self._lengths)) & (days >= 1)
+        ok[ok] &= days[ok] <= self._lengths_arr[months[ok] - 1]
+        return ok
+
+    def label(self, days):
+        year, month, day = self.from_days(days)
+        return f"{day} {self.months[month - 1][0]} {self.year_label(year)}"
+
+    def year_label(self, year):
+        starts = [start for _, start in self.eras]
+        i = bisect_right(starts, year) - 1
+        if i < 0:
+            return str(year)
+        era, start = self.eras[i]
+        return f"{year - start + 1} {era}"
+
+    def spec(self):
+        return {"type": self.name, "months": [list(m) for m in self.months], "eras": [list(e) for e in self.eras]}
+
+def from_spec(spec: Optional[Dict[str, Any]]) -> Calendar:
+    """Build a calendar from its stored form (the project's 'calendar' entry)."""
+    if not spec or spec.get("type", "gregorian") == "gregorian":
+        return GregorianCalendar()
+    if spec["type"] == "custom":
+        return CustomCalendar(spec.get("months", []), spec.get("eras", []))
+    raise ValueError(f"unknown calendar type {spec['type']!r}")
+
+_current: Calendar = GregorianCalendar()
+
+def current() -> Calendar:
+    """The calendar the open project uses."""
+    return _current
+
+def set_current(calendar: Calendar) -> None:
+    global _current
+    _current = calendar
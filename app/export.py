@@ -0,0 +1,268 @@
+from __future__ import annotations
+import argparse
+import csv
+import html
+import io
+import os
+import re
+from dataclasses import dataclass
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from .calendars import Calendar, current, from_spec, set_current
+from .storage import file_lock, iter_collection, read_meta
+
+Record = Dict[str, Any]
+Batches = Iterable[Tuple[str, List[Record]]]
+
+class Source:
+    """
+    Where exported records come from: the open session's state, or the data on
+    disk through storage.iter_collection (one shard at a time in project mode).
+    """
+    def __init__(self, state: Optional[Dict[str, Any]] = None):
+        self.state = state
+
+    def batches(self, coll: str, order: Optional[Callable[[str], Any]] = None) -> Batches:
+        if self.state is not None:
+            return [(coll, self.state.get(coll, []))]
+        return iter_collection(coll, order)
+
+@dataclass
+class Report:
+    """
+    A report ready to render: rows grouped under headings, produced lazily.
+    Column kinds are 'title' (heading of each entry), 'field' (a short line),
+    'text' (free text) and 'list' (a list of strings).
+    """
+    title: str
+    group_name: str
+    columns: List[Tuple[str, str]]
+    groups: Iterator[Tuple[str, Iterator[Record]]]
+
+# --- sort ----------------------------------------------------------------------
+
+def _shard_year(name: str):
+    # Event shards are named after the year of their events (events/2025.json, events/-0044.json)
+    m = re.search(r"(-?\d+)\.json$", name)
+    return (0, int(m.group(1))) if m else (1, 0)
+
+def _chronological(batches: Batches) -> Iterator[Tuple[Record, Optional[int], Optional[int]]]:
+    """
+    (event, start day, end day) in date order, undated events last. Each batch
+    is sorted on its own, so with year shards read in year order only one shard
+    is in memory at a time (plus the undated events, held back until the end).
+    """
+    cal = current()
+    undated = []
+    for _, records in batches:
+        starts, dated = cal.parse_many(r.get("start_date", "") for r in records)
+        ends, has_end = cal.parse_many(r.get("end_date", "") for r in records)
+        keyed = []
+        for r, s, ok, e, has_e in zip(records, starts.tolist(), dated.tolist(), ends.tolist(), has_end.tolist()):
+            if ok:
+                keyed.append((s, e if has_e and e >= s else s, r))
+            else:
+                undated.append(r)
+        keyed.sort(key=itemgetter(0, 1))
+        for s, e, r in keyed:
+            yield r, s, e
+    for r in undated:
+        yield r, None, None
+
+def _alphabetical(batches: Batches) -> List[Record]:
+    # Characters and places are a single shard each, so sorting them in memory costs no extra reads
+    return sorted((r for _, records in batches for r in records), key=lambda r: r.get("name", "").casefold())
+
+# --- group ---------------------------------------------------------------------
+
+def _grouped(pairs: Iterable[Tuple[str, Record]]) -> Iterator[Tuple[str, Iterator[Record]]]:
+    # The pairs arrive sorted by group, so groupby hands out one group at a time
+    for key, group in groupby(pairs, key=itemgetter(0)):
+        yield key, (row for _, row in group)
+
+def _initial(name: str) -> str:
+    first = name[:1].upper()
+    return first if first.isalpha() else "#"
+
+def _when(cal: Calendar, start: Optional[int], end: Optional[int], raw: str) -> str:
+    if start is None:
+        return raw or "undated"
+    if end is not None and end > start:
+        return f"{cal.label(start)} – {cal.label(end)}"
+    return cal.label(start)
+
+def _appearances(source: Source, field: str) -> Dict[str, List[str]]:
+    """
+    Name -> 'date: title' lines of the events listing it under field, in date
+    order. Only these lines are kept (shared between names), not the events.
+    """
+    cal = current()
+    out: Dict[str, List[str]] = {}
+    for ev, start, end in _chronological(source.batches("events", _shard_year)):
+        line = f"{_when(cal, start, end, ev.get('start_date', ''))}: {ev.get('title', '')}"
+        for name in dict.fromkeys(ev.get(field, [])):
+            out.setdefault(name, []).append(line)
+    return out
+
+def event_digest(source: Source) -> Report:
+    """All events in date order, grouped by year."""
+    cal = current()
+
+    def pairs():
+        for ev, start, end in _chronological(source.batches("events", _shard_year)):
+            year = cal.year_label(cal.from_days(start)[0]) if start is not None else "Undated"
+            yield year, {
+                "Title": ev.get("title", ""),
+                "Date": _when(cal, start, end, ev.get("start_date", "")),
+                "Characters": ", ".join(ev.get("characters", [])),
+                "Places": ", ".join(ev.get("places", [])),
+                "Description": ev.get("description", ""),
+                "Notes": ev.get("texts", []),
+            }
+    columns = [("Title", "title"), ("Date", "field"), ("Characters", "field"), ("Places", "field"),
+               ("Description", "text"), ("Notes", "list")]
+    return Report("Events", "Year", columns, _grouped(pairs()))
+
+def character_dossiers(source: Source) -> Report:
+    """One entry per character with description, notes and appearances, by name."""
+    appearances = _appearances(source, "characters")
+
+    def pairs():
+        for c in _alphabetical(source.batches("characters")):
+            yield _initial(c.get("name", "")), {
+                "Name": c.get("name", ""),
+                "Description": c.get("description", ""),
+                "Notes": c.get("texts", []),
+                "Appearances": appearances.get(c.get("name", ""), []),
+            }
+    columns = [("Name", "title"), ("Description", "text"), ("Notes", "list"), ("Appearances", "list")]
+    return Report("Characters", "Letter", columns, _grouped(pairs()))
+
+def place_appearances(source: Source) -> Report:
+    """One entry per place with the events that happen there, by name."""
+    appearances = _appearances(source, "places")
+
+    def pairs():
+        for p in _alphabetical(source.batches("places")):
+            yield _initial(p.get("name", "")), {
+                "Name": p.get("name", ""),
+                "Description": p.get("description", ""),
+                "Appearances": appearances.get(p.get("name", ""), []),
+            }
+    columns = [("Name", "title"), ("Description", "text"), ("Appearances", "list")]
+    return Report("Places", "Letter", columns, _grouped(pairs()))
+
+# --- render --------------------------------------------------------------------
+
+def render_markdown(report: Report) -> Iterator[str]:
+    yield f"# {report.title}\n"
+    for group, rows in report.groups:
+        yield f"\n## {group}\n"
+        for row in rows:
+            out = []
+            for name, kind in report.columns:
+                value = row.get(name)
+                if not value:
+                    continue
+                if kind == "title":
+                    out.append(f"\n### {value}\n\n")
+                elif kind == "field":
+                    out.append(f"- **{name}:** {value}\n")
+                elif kind == "text":
+                    out.append(f"\n{value.strip()}\n")
+                else:
+                    out.append(f"\n**{name}**\n\n")
+                    out.extend("- " + item.strip().replace("\n", "\n  ") + "\n" for item in value)
+            yield "".join(out)
+
+def _html_text(text: str) -> str:
+    paragraphs = [p for p in re.split(r"\n\s*\n", text.strip()) if p]
+    return "".join(f"<p>{html.escape(p).replace(chr(10), '<br>')}</p>\n" for p in paragraphs)
+
+def render_html(report: Report) -> Iterator[str]:
+    title = html.escape(report.title)
+    yield (
+        '<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n'
+        f"<title>{title}</title>\n</head>\n<body>\n<h1>{title}</h1>\n"
+    )
+    for group, rows in report.groups:
+        yield f"<h2>{html.escape(group)}</h2>\n"
+        for row in rows:
+            out = ["<article>\n"]
+            for name, kind in report.columns:
+                value = row.get(name)
+                if not value:
+                    continue
+                if kind == "title":
+                    out.append(f"<h3>{html.escape(value)}</h3>\n")
+                elif kind == "field":
+                    out.append(f"<p><b>{html.escape(name)}:</b> {html.escape(value)}</p>\n")
+                elif kind == "text":
+                    out.append(_html_text(value))
+                else:
+                    out.append(f"<h4>{html.escape(name)}</h4>\n<ul>\n")
+                    out.extend(f"<li>{html.escape(item).replace(chr(10), '<br>')}</li>\n" for item in value)
+                    out.append("</ul>\n")
+            out.append("</article>\n")
+            yield "".join(out)
+    yield "</body>\n</html>\n"
+
+def render_csv(report: Report) -> Iterator[str]:
+    # csv.writer needs a file; write each row into a reused buffer and hand out its contents
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def take() -> str:
+        chunk = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk
+
+    writer.writerow([report.group_name] + [name for name, _ in report.columns])
+    yield take()
+    for group, rows in report.groups:
+        for row in rows:
+            values = [row.get(name, "") for name, _ in report.columns]
+            writer.writerow([group] + ["\n".join(v) if isinstance(v, list) else v for v in values])
+            yield take()
+
+# --- write ---------------------------------------------------------------------
+
+REPORTS = {"events": event_digest, "characters": character_dossiers, "places": place_appearances}
+RENDERERS = {"md": render_markdown, "html": render_html, "csv": render_csv}
+SUFFIXES = {".md": "md", ".markdown": "md", ".html": "html", ".htm": "html", ".csv": "csv"}
+
+def export(report: str, path, source: Source, fmt: Optional[str] = None) -> None:
+    """
+    Write one of REPORTS to path chunk by chunk, as it is generated. The format
+    defaults to the file's suffix. Output goes to a .tmp file that replaces
+    path once complete, so a failed export leaves no half-written file behind.
+    """
+    path = Path(path)
+    fmt = fmt or SUFFIXES.get(path.suffix.lower())
+    if fmt not in RENDERERS:
+        raise ValueError(f"unknown export format for {path.name!r}; use .md, .html or .csv")
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        # newline="" lets the csv module write its own line endings
+        with open(tmp, "w", encoding="utf-8", newline="") as fh:
+            for chunk in RENDERERS[fmt](REPORTS[report](source)):
+                fh.write(chunk)
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export an event digest, character dossiers or place appearance lists.")
+    parser.add_argument("report", choices=list(REPORTS))
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--format", choices=list(RENDERERS), help="default: from the output file's suffix")
+    args = parser.parse_args()
+    if args.format is None and args.output.suffix.lower() not in SUFFIXES:
+        parser.error("can't tell the format from the file name; pass --format")
+    with file_lock(shared=True):
+        set_current(from_spec(read_meta().get("calendar")))
+        export(args.report, args.output, Source(), args.format)
@@ -0,0 +1,106 @@
+from __future__ import annotations
+import sys
+from collections import deque
+from dataclasses import dataclass, fields
+from itertools import chain
+from typing import Any, Deque, Dict, Iterator, Optional
+from .sync import COLLECTIONS
+
+def _size(value: Any) -> int:
+    """Rough memory estimate of a field value (strings and lists of strings)."""
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_size(v) for v in value)
+    return sys.getsizeof(value)
+
+def _fields(obj) -> Dict[str, Any]:
+    # Shallow on purpose: the tabs replace field values (new lists) rather than mutating
+    # them, so a change can share the values with the live objects instead of copying
+    return {f.name: getattr(obj, f.name) for f in fields(obj)}
+
+@dataclass
+class Change:
+    """
+    One recorded edit. For an edit, before/after hold only the fields that
+    changed; for an add or a removal, the other side is None and the present
+    side holds the whole record. Entities are found again by their key
+    (name or title, lowercased) before and after the change.
+    """
+    collection: str
+    row: int
+    key_before: Optional[str]
+    key_after: Optional[str]
+    before: Optional[Dict[str, Any]]
+    after: Optional[Dict[str, Any]]
+    size: int = 0
+
+class History:
+    """
+    Undo/redo stacks of Changes, kept under a memory budget (in bytes) by
+    dropping the oldest undo entries first.
+    """
+    def __init__(self, budget: int = 2 * 1024 * 1024):
+        self.budget = budget
+        self.used = 0
+        self._undo: Deque[Change] = deque()
+        self._redo: Deque[Change] = deque()
+
+    def record(self, collection: str, before, after, row: int) -> Optional[Change]:
+        """Record a (before, after) model pair as emitted by the tabs' record_changed."""
+        key = COLLECTIONS[collection]
+        old = _fields(before) if before is not None else None
+        new = _fields(after) if after is not None else None
+        if old is not None and new is not None:
+            changed = [k for k in new if old[k] != new[k]]
+            if not changed:
+                return None
+            old = {k: old[k] for k in changed}
+            new = {k: new[k] for k in changed}
+        change = Change(
+            collection, row,
+            getattr(before, key).lower() if before is not None else None,
+            getattr(after, key).lower() if after is not None else None,
+            old, new,
+        )
+        change.size = sum(_size(v) for side in (old, new) if side for v in side.values()) + 200
+        self._undo.append(change)
+        self.used += change.size
+        self._clear(self._redo)
+        self._evict()
+        return change
+
+    def _clear(self, stack: Deque[Change]):
+        self.used -= sum(c.size for c in stack)
+        stack.clear()
+
+    def _evict(self):
+        while self.used > self.budget and self._undo:
+            self.used -= self._undo.popleft().size
+
+    def field_values(self, name: str) -> Iterator[Any]:
+        """Every value of field name held by the undo and redo stacks (e.g. images undo can bring back)."""
+        for change in chain(self._undo, self._redo):
+            for side in (change.before, change.after):
+                if side and name in side:
+                    yield side[name]
+
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def undo(self) -> Optional[Change]:
+        """Pop the latest change (to be reverted by the caller) onto the redo stack."""
+        if not self._undo:
+            return None
+        change = self._undo.pop()
+        self._redo.append(change)
+        return change
+
+    def redo(self) -> Optional[Change]:
+        if not self._redo:
+            return None
+        change = self._redo.pop()
+        self._undo.append(change)
+        self._evict()
+        return change
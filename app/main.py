@@ -1,9 +1,22 @@
 import sys
 from dataclasses import asdict
-from PySide6.QtWidgets import QApplication, QWidget, QTabWidget, QVBoxLayout, QMessageBox
+from pathlib import Path
+from PySide6.QtCore import QFileSystemWatcher, QTimer
+from PySide6.QtGui import QKeySequence
+from PySide6.QtWidgets import (
+    QApplication, QWidget, QTabWidget, QVBoxLayout, QMessageBox, QMenuBar, QInputDialog, QFileDialog,
+)
 
+from .analytics import RelationshipStats
+from .assets import default_store
+from .calendars import current, from_spec, set_current
+from .export import SUFFIXES, Source, export
+from .history import History
 from .models import Character, Place, Event
-from .storage import load_state, save_state
+from .storage import file_lock, load_state, read_state, state_file, write_state
+from .sync import COLLECTIONS, hash_state, merge_states
+from .ui.analytics import RelationshipsTab
+from .ui.calendar_dialog import CalendarDialog
 from .ui.tabs import CharactersTab, EventsTab, PlacesTab
 from .ui.timeline import TimelineTab
 
@@ -13,7 +26,31 @@ class MainWindow(QWidget):
         self.setWindowTitle("timeline – MVP with Timeline")
         self.resize(900, 600)
 
-        state = load_state()
+        # A project that can't be read (say, a shard that doesn't match its manifest) must not be
+        # saved over: the window then starts empty and read-only
+        self._read_only = False
+        try:
+            state = load_state()
+        except (OSError, ValueError, KeyError) as e:
+            state = {"characters": [], "places": [], "events": []}
+            self._read_only = True
+            self.setWindowTitle(self.windowTitle() + " (read-only)")
+            QMessageBox.critical(
+                self, "Can't read the project",
+                f"The project could not be read: {e}\n\n"
+                "This window opens empty and won't save anything. Repair or restore the project, then open it again.",
+            )
+        # Hashes of what we last synced with disk are the base of the 3-way merge (see _reload_external)
+        self._synced = hash_state(state)
+        # Images are stored by content hash; old 'pictures/…' paths are imported on first load
+        self.assets = default_store()
+        self.assets.migrate(state)
+        self.assets.rebuild_refs(state)
+        # Dates are read through the project's calendar from here on
+        try:
+            set_current(from_spec(state.get("calendar")))
+        except (ValueError, KeyError, TypeError) as e:
+            QMessageBox.warning(self, "Calendar", f"Unknown calendar in data file, using Gregorian: {e}")
         characters = [Character(**c) for c in state.get("characters", [])]
         place_names = [p["name"] for p in state.get("places", [])]
         events = [Event(**e) for e in state.get("events", [])]
@@ -22,36 +59,323 @@ class MainWindow(QWidget):
         self.chars_tab = CharactersTab(characters)
         self.places_tab = PlacesTab([Place(**p) if not isinstance(p, Place) else p for p in state.get("places", [])])
         self.events_tab = EventsTab(events, characters=characters, places=self.places_tab.values())
-        self.timeline_tab = TimelineTab(self.events_tab.values, self.chars_tab.values)
+        self._applying = False  # set while undo/redo/reload patch the tabs, so that isn't recorded
+        self._reloading = False  # set while merging in another window's save; forms are flushed quietly then
+        self.timeline_tab = TimelineTab(
+            lambda: self.events_tab.values(self._reloading), lambda: self.chars_tab.values(self._reloading),
+        )
+        self.stats = RelationshipStats(self.events_tab.events)
+        self.relations_tab = RelationshipsTab(self.stats, lambda: self.chars_tab.chars)
+        self.history = History()
 
         # to sync data between tabs
         self.chars_tab.data_changed.connect(self._update_events_characters)
         self.places_tab.data_changed.connect(self._update_events_places)
+        self.events_tab.record_changed.connect(self._on_event_changed)
+        for coll, tab in self._tabs_by_collection().items():
+            tab.record_changed.connect(lambda b, a, row, coll=coll: self._track_assets(coll, b, a))
+            tab.record_changed.connect(lambda b, a, row, coll=coll: self._record_history(coll, b, a, row))
 
         self.tabs.addTab(self.chars_tab, "Characters")
         self.tabs.addTab(self.places_tab, "Places")
         self.tabs.addTab(self.events_tab, "Events")
         self.tabs.addTab(self.timeline_tab, "Timeline")
+        self.tabs.addTab(self.relations_tab, "Relationships")
+
+        menu = QMenuBar()
+        file_menu = menu.addMenu("File")
+        file_menu.addAction("Calendar…", self._edit_calendar)
+        file_menu.addAction("Remove unused images…", self._collect_garbage)
+        file_menu.addAction("Export…", self._export)
+        edit_menu = menu.addMenu("Edit")
+        self.undo_action = edit_menu.addAction("Undo", self._undo)
+        self.undo_action.setShortcut(QKeySequence.Undo)
+        self.redo_action = edit_menu.addAction("Redo", self._redo)
+        self.redo_action.setShortcut(QKeySequence.Redo)
+        self._update_undo_actions()
 
         layout = QVBoxLayout(self)
+        layout.setMenuBar(menu)
         layout.addWidget(self.tabs)
 
-    def closeEvent(self, event):
-        state = {
-            "characters": [asdict(c) for c in self.chars_tab.values()],
-            "places": [asdict(p) for p in self.places_tab.values()],
-            "events": [asdict(e) for e in self.events_tab.values()],
+        # Watch the data file for edits made by other windows/processes
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self._schedule_reload)
+        self.watcher.directoryChanged.connect(self._schedule_reload)
+        self._reload_timer = QTimer(self)
+        self._reload_timer.setSingleShot(True)
+        self._reload_timer.setInterval(300)  # coalesce bursts of change notifications
+        self._reload_timer.timeout.connect(self._reload_external)
+        self._watch()
+
+    def _current_state(self, quiet=False):
+        return {
+            "characters": [asdict(c) for c in self.chars_tab.values(quiet)],
+            "places": [asdict(p) for p in self.places_tab.values(quiet)],
+            "events": [asdict(e) for e in self.events_tab.values(quiet)],
+            "calendar": current().spec(),
         }
+
+    def _watch(self):
+        # Saves replace the file, which drops it from the watcher, so re-add it each time
+        path = state_file()
+        paths = [str(path.parent)] + ([str(path)] if path.exists() else [])
+        missing = [p for p in paths if p not in self.watcher.files() + self.watcher.directories()]
+        if missing:
+            self.watcher.addPaths(missing)
+
+    def _schedule_reload(self, _path=None):
+        self._reload_timer.start()
+
+    def _read_remote(self):
         try:
-            save_state(state)
+            with file_lock(shared=True):
+                return read_state()
+        except (OSError, ValueError, KeyError):
+            return None  # unreadable/partial file, wait for the next change
+
+    def _reload_external(self):
+        self._watch()
+        remote = self._read_remote()
+        if remote is None:
+            return
+        remote_hashes = hash_state(remote)
+        if remote_hashes == self._synced:
+            return  # our own save, or a touch without changes
+        # Nobody asked for this save, so invalid input in the open forms stays there without a popup
+        result = merge_states(self._synced, self._current_state(quiet=True), remote, prefer_local=None)
+        self._reloading = True
+        try:
+            # Edits from other windows aren't ours to undo; the timeline is redrawn once below
+            self._applying = True
+            try:
+                for coll, tab in self._tabs_by_collection().items():
+                    tab.apply_changes(result.changed.get(coll, []), result.removed.get(coll, []))
+            finally:
+                self._applying = False
+            if "characters" in result.changed or "characters" in result.removed:
+                self._update_events_characters()
+            if "places" in result.changed or "places" in result.removed:
+                self._update_events_places()
+            if result.changed or result.removed:
+                self.timeline_tab.refresh()
+        finally:
+            self._reloading = False
+        # Conflicting records keep their old base so they are detected again on save
+        for coll, key in result.conflicts:
+            if key in self._synced[coll]:
+                remote_hashes[coll][key] = self._synced[coll][key]
+            else:
+                remote_hashes[coll].pop(key, None)
+        self._synced = remote_hashes
+        if result.conflicts:
+            QMessageBox.warning(
+                self, "Edited elsewhere",
+                "These were changed both here and in another window; your version is kept for now:\n"
+                + "\n".join(f"{coll}: {key}" for coll, key in result.conflicts),
+            )
+
+    def closeEvent(self, event):
+        local = self._current_state()
+        if self._read_only:
+            if self.history.can_undo():
+                self._close_unsaved(event, "This window is read-only: the project could not be read when it opened.")
+            else:
+                event.accept()
+            return
+        try:
+            remote = self._read_remote()
+            prefer_local = True
+            conflicts = merge_states(self._synced, local, remote).conflicts if remote is not None else []
+            if conflicts:
+                answer = QMessageBox.question(
+                    self, "Conflicting changes",
+                    f"{len(conflicts)} item(s) were also changed in another window:\n"
+                    + "\n".join(f"{coll}: {key}" for coll, key in conflicts)
+                    + "\n\nOverwrite them with your version?",
+                )
+                prefer_local = answer == QMessageBox.Yes
+            # If the data on disk can't be read, nothing is written: saving only this window's
+            # records would drop everything else
+            with file_lock():
+                state = merge_states(self._synced, local, read_state(), prefer_local).state
+                write_state(state)
         except Exception as e:
-            QMessageBox.critical(self, "Save failed", f"Could not save data: {e}")
+            self._close_unsaved(event, f"Could not save data: {e}")
+            return
         event.accept()
+
+    def _close_unsaved(self, event, reason):
+        answer = QMessageBox.question(
+            self, "Not saved", f"{reason}\n\nClose anyway and lose the changes made in this window?",
+        )
+        if answer == QMessageBox.Yes:
+            event.accept()
+        else:
+            event.ignore()
+
+    def _tabs_by_collection(self):
+        return {"characters": self.chars_tab, "places": self.places_tab, "events": self.events_tab}
+
+    def _on_event_changed(self, before, after, row):
+        self.stats.update(before, after)
+        self.relations_tab.mark_dirty()
+        self.timeline_tab.minimap.update_event(before, after)
+        if not self._reloading:
+            self.timeline_tab.graph.update_event(before, after)
+
+    def _record_history(self, coll, before, after, row):
+        if not self._applying:
+            self.history.record(coll, before, after, row)
+            self._update_undo_actions()
+
+    def _update_undo_actions(self):
+        self.undo_action.setEnabled(self.history.can_undo())
+        self.redo_action.setEnabled(self.history.can_redo())
+
+    def _undo(self):
+        self._current_state()  # flush open forms so a pending edit is undone first
+        change = self.history.undo()
+        if change is not None:
+            self._apply_change(change.collection, change.row, change.key_after, change.before, change.key_before is None)
+        self._update_undo_actions()
+
+    def _redo(self):
+        self._current_state()
+        change = self.history.redo()
+        if change is not None:
+            self._apply_change(change.collection, change.row, change.key_before, change.after, change.key_after is None)
+        self._update_undo_actions()
+
+    def _apply_change(self, coll, row, key, values, removes):
+        """
+        Move one record from the side identified by key to values: remove it (removes),
+        re-insert it at row (key is None) or set the changed fields.
+        """
+        tab = self._tabs_by_collection()[coll]
+        self._applying = True
+        try:
+            if removes:
+                tab.remove_record(key)
+            elif key is None:
+                tab.insert_record(row, values)
+            else:
+                tab.patch_record(key, values)
+        finally:
+            self._applying = False
+        if coll == "characters":
+            self._update_events_characters()
+        elif coll == "places":
+            self._update_events_places()
+
+    def _track_assets(self, coll, before, after):
+        key = COLLECTIONS[coll]
+        if before is not None:
+            self.assets.set_refs(f"{coll}:{getattr(before, key)}", before.images, ())
+        if after is not None:
+            self.assets.set_refs(f"{coll}:{getattr(after, key)}", (), after.images)
+
+    def _edit_calendar(self):
+        dialog = CalendarDialog(current(), self)
+        if not dialog.exec():
+            return
+        try:
+            calendar = dialog.calendar()
+        except ValueError as e:
+            QMessageBox.warning(self, "Calendar", f"Invalid calendar: {e}")
+            return
+        # Dates are stored as Y-M-D text, so every existing date has to exist in the new calendar
+        events = self.events_tab.values()
+        texts = [e.start_date for e in events] + [e.end_date for e in events]
+        _, valid = calendar.parse_many(texts)
+        bad = sorted({events[i % len(events)].title for i, t in enumerate(texts) if t and not valid[i]})
+        if bad:
+            QMessageBox.warning(
+                self, "Calendar",
+                "These events have dates that don't exist in that calendar:\n" + "\n".join(bad[:20]),
+            )
+            return
+        set_current(calendar)
+        self.stats = self.relations_tab.stats = RelationshipStats(events)
+        self.relations_tab.mark_dirty()
+        self.timeline_tab.refresh()
+
+    def _kept_images(self):
+        """
+        Images to keep besides the ones this session's records use: those of the
+        saved records (other windows' too) and those undo/redo can bring back, and
+        (as a time) whatever was imported since the last save, which may be in
+        another window's unsaved form. The caller is expected to hold file_lock().
+        """
+        saved = read_state()
+        live = [image for coll in COLLECTIONS for r in saved.get(coll, []) for image in r.get("images", [])]
+        live += [image for images in self.history.field_values("images") for image in images]
+        path = state_file()
+        return live, path.stat().st_mtime if path.exists() else None
+
+    def _collect_garbage(self):
+        self._current_state()  # flush open forms so their images count as referenced
+        try:
+            with file_lock(shared=True):
+                live, since = self._kept_images()
+                unused = list(self.assets.unreferenced(live, since).values())
+                originals = self.assets.legacy_originals(live)
+        except (OSError, ValueError, KeyError) as e:
+            QMessageBox.warning(self, "Images", f"Could not read the saved data, so no images were removed: {e}")
+            return
+        if not unused and not originals:
+            QMessageBox.information(self, "Images", "All stored images are in use.")
+            return
+        size = sum(path.stat().st_size for path in unused + originals if path.exists())
+        parts = []
+        if unused:
+            parts.append(f"{len(unused)} image(s) no character, place or event uses")
+        if originals:
+            parts.append(f"{len(originals)} old picture(s) in pictures/ that were copied into pictures/assets/ and aren't referred to by their old path any more")
+        answer = QMessageBox.question(
+            self, "Remove unused images", f"Delete {' and '.join(parts)} ({size / 1e6:.1f} MB)?",
+        )
+        if answer != QMessageBox.Yes:
+            return
+        try:
+            # Checked again under the lock: another window may have saved meanwhile
+            with file_lock():
+                removed, freed = self.assets.collect_garbage(*self._kept_images())
+        except (OSError, ValueError, KeyError) as e:
+            QMessageBox.warning(self, "Images", f"Could not remove unused images: {e}")
+            return
+        QMessageBox.information(self, "Images", f"Removed {removed} image(s), {freed / 1e6:.1f} MB freed.")
+
+    def _export(self):
+        titles = {"Event digest": "events", "Character dossiers": "characters", "Place appearances": "places"}
+        choice, ok = QInputDialog.getItem(self, "Export", "Report:", list(titles), 0, False)
+        if not ok:
+            return
+        formats = {"Markdown (*.md)": "md", "HTML (*.html)": "html", "CSV (*.csv)": "csv"}
+        dialog = QFileDialog(self, "Export")
+        dialog.setAcceptMode(QFileDialog.AcceptSave)
+        dialog.setNameFilters(list(formats))
+        # The suggested name has no suffix, so the dialog adds the one of the chosen format
+        dialog.setDefaultSuffix("md")
+        dialog.filterSelected.connect(lambda chosen: dialog.setDefaultSuffix(formats[chosen]))
+        dialog.selectFile(titles[choice])
+        if not dialog.exec():
+            return
+        path = dialog.selectedFiles()[0]
+        # A suffix typed in by hand wins over the filter
+        fmt = SUFFIXES.get(Path(path).suffix.lower()) or formats[dialog.selectedNameFilter()]
+        try:
+            export(titles[choice], path, Source(self._current_state()), fmt)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Export failed", f"Could not export: {e}")
+
     def _update_events_characters(self):
-            self.events_tab.set_characters([c.name for c in self.chars_tab.values()])
+            # Read the list directly: values() saves the form, which emits data_changed again
+            self.events_tab.set_characters([c.name for c in self.chars_tab.chars])
+            self.timeline_tab.minimap.set_characters(self.chars_tab.chars, self.events_tab.events)
 
     def _update_events_places(self):
-            self.events_tab.set_places([p.name for p in self.places_tab.values()])
+            self.events_tab.set_places([p.name for p in self.places_tab.places])
 def main():
     app = QApplication(sys.argv)
     w = MainWindow()
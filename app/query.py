@@ -0,0 +1,175 @@
+from __future__ import annotations
+import shlex
+from typing import Dict, Iterable, List, Optional, Set
+import numpy as np
+from .calendars import current
+from .models import Event
+
+class EventIndex:
+    """
+    Per-field indexes over a list of events: start/end day numbers (see
+    calendars) as sorted arrays, and postings from (lowercased) character/place
+    names to event positions.
+    """
+    def __init__(self, events: Iterable[Event]):
+        self.events: List[Event] = list(events)
+        self.all: Set[int] = set(range(len(self.events)))
+        cal = current()
+        # Day numbers for every event, converted in bulk; undated events are left out of the date arrays
+        self.start_days, dated = cal.parse_many(e.start_date for e in self.events)
+        end_days, has_end = cal.parse_many(e.end_date for e in self.events)
+        self.end_days = np.where(has_end & (end_days >= self.start_days), end_days, self.start_days)
+        self.dated = dated
+        idx = np.flatnonzero(dated)
+        self._by_start = idx[np.argsort(self.start_days[idx], kind="stable")]
+        self._starts = self.start_days[self._by_start]
+        self._by_end = idx[np.argsort(self.end_days[idx], kind="stable")]
+        self._ends = self.end_days[self._by_end]
+        self.by_character: Dict[str, Set[int]] = {}
+        self.by_place: Dict[str, Set[int]] = {}
+        self._text: List[str] = []
+        for i, e in enumerate(self.events):
+            for name in e.characters:
+                self.by_character.setdefault(name.lower(), set()).add(i)
+            for name in e.places:
+                self.by_place.setdefault(name.lower(), set()).add(i)
+            self._text.append("\n".join([e.title, e.description, *e.texts]).casefold())
+
+    def overlapping(self, start: Optional[int] = None, end: Optional[int] = None) -> Set[int]:
+        """Events whose [start, end] days overlap [start, end]; None bounds are open."""
+        by_start = self._by_start if end is None else self._by_start[: np.searchsorted(self._starts, end, "right")]
+        if start is None:
+            return set(by_start.tolist())
+        by_end = self._by_end[np.searchsorted(self._ends, start, "left"):]
+        return set(by_start.tolist()).intersection(by_end.tolist())
+
+    def containing(self, text: str) -> Set[int]:
+        needle = text.casefold()
+        return {i for i, blob in enumerate(self._text) if needle in blob}
+
+    def run(self, query: "Query") -> List[Event]:
+        """Matching events, in their original order."""
+        return [self.events[i] for i in sorted(query.evaluate(self))]
+
+class Query:
+    """Base class for predicates; combine them with &, | and ~."""
+    def evaluate(self, index: EventIndex) -> Set[int]:
+        raise NotImplementedError
+
+    def __and__(self, other: "Query") -> "Query":
+        return And(self, other)
+
+    def __or__(self, other: "Query") -> "Query":
+        return Or(self, other)
+
+    def __invert__(self) -> "Query":
+        return Not(self)
+
+class Everything(Query):
+    def evaluate(self, index):
+        return set(index.all)
+
+class DateRange(Query):
+    """Events overlapping the day numbers [start, end]; None leaves a side open."""
+    def __init__(self, start: Optional[int] = None, end: Optional[int] = None):
+        self.start, self.end = start, end
+
+    def evaluate(self, index):
+        return index.overlapping(self.start, self.end)
+
+class WithCharacters(Query):
+    """Events involving any of the given characters."""
+    def __init__(self, *names: str):
+        self.names = [n.lower() for n in names]
+
+    def evaluate(self, index):
+        return set().union(*(index.by_character.get(n, set()) for n in self.names))
+
+class AtPlaces(Query):
+    """Events at any of the given places."""
+    def __init__(self, *names: str):
+        self.names = [n.lower() for n in names]
+
+    def evaluate(self, index):
+        return set().union(*(index.by_place.get(n, set()) for n in self.names))
+
+class TextMatch(Query):
+    """Case-insensitive substring match on title, description and notes."""
+    def __init__(self, text: str):
+        self.text = text
+
+    def evaluate(self, index):
+        return index.containing(self.text)
+
+class And(Query):
+    def __init__(self, *parts: Query):
+        self.parts = parts
+
+    def evaluate(self, index):
+        if not self.parts:
+            return set(index.all)
+        # Start from the most selective side so intersections stay small
+        results = sorted((p.evaluate(index) for p in self.parts), key=len)
+        return results[0].intersection(*results[1:])
+
+class Or(Query):
+    def __init__(self, *parts: Query):
+        self.parts = parts
+
+    def evaluate(self, index):
+        return set().union(*(p.evaluate(index) for p in self.parts))
+
+class Not(Query):
+    def __init__(self, part: Query):
+        self.part = part
+
+    def evaluate(self, index):
+        return index.all - self.part.evaluate(index)
+
+def _period(value: str):
+    period = current().period(value)
+    if period is None:
+        raise ValueError(f"not a date: {value!r}")
+    return period
+
+def _parse_term(token: str) -> Query:
+    field, sep, value = token.partition(":")
+    if sep and field.lower() in ("char", "character"):
+        return WithCharacters(*value.split(","))
+    if sep and field.lower() == "place":
+        return AtPlaces(*value.split(","))
+    if sep and field.lower() in ("year", "in"):
+        return DateRange(*_period(value))
+    if sep and field.lower() == "from":
+        return DateRange(start=_period(value)[0])
+    if sep and field.lower() == "to":
+        return DateRange(end=_period(value)[1])
+    return TextMatch(token)
+
+def parse_query(text: str) -> Query:
+    """
+    Parse a filter like 'char:mikael place:karlskrona year:2025'.
+    Terms are ANDed; 'or' separates alternatives; 'not' or a leading '-'
+    negates a term. Names can be comma-separated ('char:a,b' = a or b) and
+    quoted when they contain spaces. Bare words match title/description/notes.
+    Dates for year:/in:/from:/to: may be a year, 'YYYY-MM' or a full date.
+    Raises ValueError on unbalanced quotes or invalid dates.
+    """
+    groups: List[List[Query]] = [[]]
+    negate = False
+    for token in shlex.split(text):
+        word = token.lower()
+        if word == "or":
+            groups.append([])
+        elif word == "not":
+            negate = not negate
+        elif word != "and":
+            if token.startswith("-") and len(token) > 1:
+                negate, token = not negate, token[1:]
+            term = _parse_term(token)
+            groups[-1].append(Not(term) if negate else term)
+            negate = False
+    alternatives = [And(*g) for g in groups if g]
+    if not alternatives:
+        return Everything()
+    return alternatives[0] if len(alternatives) == 1 else Or(*alternatives)
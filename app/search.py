@@ -0,0 +1,125 @@
+from __future__ import annotations
+from collections import defaultdict
+from typing import Dict, Optional, Set, Tuple
+
+def _prefixes(name: str) -> Set[str]:
+    """One- and two-character prefixes of the words in name."""
+    return {p for word in name.split() for p in (word[:1], word[:2])}
+
+def _starts(name: str) -> Set[str]:
+    """The three characters from the start of each word in name (they may run into the next word)."""
+    return {name[i:i + 3] for i in range(len(name) - 2) if not name[i].isspace() and (i == 0 or name[i - 1].isspace())}
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def name_matches(name: str, query: str) -> bool:
+    """
+    The rule NameIndex.search applies, for a casefolded name and a stripped,
+    casefolded query: query occurs in name starting at a word. A name that
+    matches a query also matches every shorter start of it, so typing on
+    only ever narrows the result.
+    """
+    i = name.find(query)
+    while i >= 0:
+        if i == 0 or name[i - 1].isspace():
+            return True
+        i = name.find(query, i + 1)
+    return False
+
+class NameIndex:
+    """
+    Casefolded names for type-ahead lookup, updated in place as names are
+    added, renamed or removed. A query matches the names where it starts at
+    a word (name_matches): shorter than three characters it is looked up in
+    the prefix postings, three characters in the word-start postings, longer
+    ones in both those and the trigram postings, checking each candidate.
+    Keys are ints chosen by the caller.
+    """
+    def __init__(self):
+        self.names: Dict[int, str] = {}
+        # One key per name, plus the others for names used more than once: a set per
+        # name would be 100k more objects for the garbage collector to walk
+        self._exact: Dict[str, int] = {}
+        self._more: Dict[str, Set[int]] = {}
+        self._prefixes: Dict[str, Set[int]] = defaultdict(set)
+        self._starts: Dict[str, Set[int]] = defaultdict(set)
+        self._trigrams: Dict[str, Set[int]] = defaultdict(set)
+        # Last query and its result, kept current on every update so typing on refines it
+        self._last: Optional[Tuple[str, Set[int]]] = None
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def add(self, key: int, name: str):
+        name = name.casefold()
+        self.names[key] = name
+        if self._exact.setdefault(name, key) != key:
+            self._more.setdefault(name, set()).add(key)
+        for p in _prefixes(name):
+            self._prefixes[p].add(key)
+        for gram in _starts(name):
+            self._starts[gram].add(key)
+        for gram in _trigrams(name):
+            self._trigrams[gram].add(key)
+        if self._last is not None and name_matches(name, self._last[0]):
+            self._last[1].add(key)
+
+    def remove(self, key: int):
+        name = self.names.pop(key, None)
+        if name is None:
+            return
+        more = self._more.get(name)
+        if self._exact[name] != key:
+            more.discard(key)
+        elif more:
+            self._exact[name] = more.pop()
+        else:
+            del self._exact[name]
+        if more is not None and not more:
+            del self._more[name]
+        for postings, grams in ((self._prefixes, _prefixes(name)), (self._starts, _starts(name)), (self._trigrams, _trigrams(name))):
+            for gram in grams:
+                postings[gram].discard(key)
+                if not postings[gram]:
+                    del postings[gram]
+        if self._last is not None:
+            self._last[1].discard(key)
+
+    def rename(self, key: int, name: str):
+        if self.names.get(key) != name.casefold():
+            self.remove(key)
+            self.add(key, name)
+
+    def find(self, name: str) -> Set[int]:
+        """Keys whose name equals name, ignoring case."""
+        name = name.casefold()
+        if name not in self._exact:
+            return set()
+        return {self._exact[name], *self._more.get(name, ())}
+
+    def matches(self, key: int, query: str) -> bool:
+        return name_matches(self.names[key], query.strip().casefold())
+
+    def search(self, query: str) -> Set[int]:
+        """Keys of the names matching query (a new set; an empty query matches everything)."""
+        query = query.strip().casefold()
+        if not query:
+            return set(self.names)
+        if len(query) < 3:
+            result = set(self._prefixes.get(query, ()))  # exact, nothing to check
+        elif len(query) == 3:
+            result = set(self._starts.get(query, ()))  # exact as well
+        else:
+            postings = [self._starts.get(query[:3], set())]
+            postings += (self._trigrams.get(g, set()) for g in _trigrams(query[1:]))
+            postings.sort(key=len)
+            last = self._last
+            if last is not None and query.startswith(last[0]) and len(last[1]) < len(postings[0]):
+                # Typing on only narrows the previous result, so check that when it's the smaller set
+                candidates = last[1]
+            else:
+                candidates = postings[0].intersection(*postings[1:])
+            result = {k for k in candidates if name_matches(self.names[k], query)}
+        self._last = (query, result)
+        return set(result)
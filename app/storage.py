@@ -1,9 +1,25 @@
+import argparse
+import hashlib
 import json
+import os
+import shutil
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
 DATA_DIR = Path("data")
 DATA_FILE = DATA_DIR / "data.json"
+LOCK_FILE = DATA_DIR / "data.json.lock"
+# Sharded project directory: used instead of DATA_FILE when its manifest exists
+PROJECT_DIR = DATA_DIR / "project"
+MANIFEST = "manifest.json"
+COLLECTION_NAMES = ("characters", "places", "events")
 
 # Default values for new fields
 DEFAULT_CHARACTER = {
@@ -54,17 +70,198 @@ def _patch_event(e: Dict[str, Any]) -> Dict[str, Any]:
             e[k] = v
     return e
 
-def load_state() -> Dict[str, List[Dict[str, Any]]]:
+@contextmanager
+def file_lock(shared: bool = False):
+    """
+    Advisory lock on a sidecar lock file, so several windows/processes don't
+    interleave reads and writes of the data file. The lock lives in its own
+    file because the data file itself is replaced on every save.
+    """
     _ensure_dir()
-    if DATA_FILE.exists():
+    with open(LOCK_FILE, "a+b") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        else:
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+            else:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+_PATCHERS = {"characters": _patch_character, "places": _patch_place, "events": _patch_event}
+
+def _patch_state(state: Dict[str, Any]) -> Dict[str, Any]:
+    state["characters"] = [_patch_character(c) for c in state.get("characters", [])]
+    state["places"] = [_patch_place(p) for p in state.get("places", [])]
+    state["events"] = [_patch_event(e) for e in state.get("events", [])]
+    return state
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+def _dump(obj: Any) -> bytes:
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+
+def _is_project(root: Path = PROJECT_DIR) -> bool:
+    return (root / MANIFEST).exists()
+
+def state_file() -> Path:
+    """The file whose replacement marks a completed save (for file watchers)."""
+    return PROJECT_DIR / MANIFEST if _is_project() else DATA_FILE
+
+# --- Sharded project directory -------------------------------------------------
+#
+# data/project/manifest.json     collections -> shard names, shard -> sha256/count
+# data/project/characters.json
+# data/project/places.json
+# data/project/events/2025.json  events bucketed by the year of their start date
+
+def _shard_name(coll: str, record: Dict[str, Any]) -> str:
+    if coll != "events":
+        return f"{coll}.json"
+    start = record.get("start_date", "")
+    # Year is everything before the last two '-' separated parts (also for '-0044-03-15')
+    year = start.rsplit("-", 2)[0] if start.count("-") >= 2 else ""
+    return f"events/{year or 'undated'}.json"
+
+def read_manifest(root: Path = PROJECT_DIR) -> Dict[str, Any]:
+    return json.loads((root / MANIFEST).read_text(encoding="utf-8"))
+
+def read_shard(name: str, manifest: Optional[Dict[str, Any]] = None, root: Path = PROJECT_DIR) -> List[Dict[str, Any]]:
+    """Load one shard, checking it against the manifest checksum when given."""
+    data = (root / name).read_bytes()
+    if manifest is not None:
+        expected = manifest["shards"].get(name, {}).get("sha256")
+        if expected != hashlib.sha256(data).hexdigest():
+            raise ValueError(f"shard {name} does not match the manifest")
+    return json.loads(data.decode("utf-8"))
+
+def read_project(root: Path = PROJECT_DIR, collections: Iterable[str] = COLLECTION_NAMES) -> Dict[str, Any]:
+    """Read the manifest and the shards of the requested collections only."""
+    manifest = read_manifest(root)
+    state: Dict[str, Any] = dict(manifest.get("meta", {}))
+    for coll in collections:
+        state[coll] = [
+            _PATCHERS[coll](r)
+            for name in manifest["collections"].get(coll, [])
+            for r in read_shard(name, manifest, root)
+        ]
+    return state
+
+def _matches_manifest(name: str, manifest: Dict[str, Any], root: Path = PROJECT_DIR) -> bool:
+    """Whether shard name still holds what manifest says (a shard that is gone matches too)."""
+    try:
+        data = (root / name).read_bytes()
+    except FileNotFoundError:
+        return True
+    return manifest["shards"][name].get("sha256") == hashlib.sha256(data).hexdigest()
+
+def write_project(state: Dict[str, Any], root: Path = PROJECT_DIR) -> List[str]:
+    """
+    Write state as shards, rewriting only those whose checksum changed, then the
+    manifest. Returns the names of the shards that were written.
+
+    Shards listed in the old manifest are only replaced or removed while they
+    still match it; otherwise (e.g. a copy synced in from another machine)
+    ValueError is raised before anything is written. An unreadable manifest
+    raises too, rather than being taken for a new project.
+    """
+    try:
+        old = read_manifest(root)
+    except FileNotFoundError:
+        old = {"shards": {}}
+    collections: Dict[str, List[str]] = {}
+    shards: Dict[str, List[Dict[str, Any]]] = {}
+    for coll in COLLECTION_NAMES:
+        collections[coll] = []
+        for record in state.get(coll, []):
+            name = _shard_name(coll, record)
+            if name not in shards:
+                shards[name] = []
+                collections[coll].append(name)
+            shards[name].append(record)
+    entries: Dict[str, Dict[str, Any]] = {}
+    dirty: Dict[str, bytes] = {}
+    for name, records in shards.items():
+        data = _dump(records)
+        digest = hashlib.sha256(data).hexdigest()
+        entries[name] = {"sha256": digest, "count": len(records)}
+        if old["shards"].get(name, {}).get("sha256") != digest or not (root / name).exists():
+            dirty[name] = data
+    stale = set(old["shards"]) - set(entries)
+    for name in sorted(stale | (set(dirty) & set(old["shards"]))):
+        if not _matches_manifest(name, old, root):
+            raise ValueError(f"shard {name} was changed outside this project's saves; not overwriting it")
+    written = []
+    for name, data in dirty.items():
+        _atomic_write(root / name, data)
+        written.append(name)
+    manifest = {
+        "version": 1,
+        "meta": {k: v for k, v in state.items() if k not in COLLECTION_NAMES},
+        "collections": collections,
+        "shards": entries,
+    }
+    # The manifest goes last: until it is replaced, readers still see the old shard set
+    _atomic_write(root / MANIFEST, _dump(manifest))
+    for name in stale:
         try:
-            state = json.loads(DATA_FILE.read_text(encoding="utf-8"))
-            state["characters"] = [_patch_character(c) for c in state.get("characters", [])]
-            state["places"] = [_patch_place(p) for p in state.get("places", [])]
-            state["events"] = [_patch_event(e) for e in state.get("events", [])]
-            return state
-        except Exception:
+            (root / name).unlink()
+        except FileNotFoundError:
             pass
+    return written
+
+def read_state() -> Dict[str, List[Dict[str, Any]]]:
+    """Read and patch the data file (or project directory). Unlike load_state, errors are raised."""
+    if _is_project():
+        return read_project()
+    if not DATA_FILE.exists():
+        return {"characters": [], "places": [], "events": []}
+    return _patch_state(json.loads(DATA_FILE.read_text(encoding="utf-8")))
+
+def read_meta() -> Dict[str, Any]:
+    """Project-wide settings (e.g. the calendar), without reading any records in project mode."""
+    if _is_project():
+        return read_manifest().get("meta", {})
+    state = read_state()
+    return {k: v for k, v in state.items() if k not in COLLECTION_NAMES}
+
+def iter_collection(coll: str, order: Optional[Callable[[str], Any]] = None) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+    """
+    Yield one collection as (shard name, records) batches, one shard at a time
+    in project mode so large projects can be streamed (sorted by order(name)
+    when given); data.json is a single batch. The caller is expected to hold
+    file_lock(shared=True).
+    """
+    if not _is_project():
+        yield DATA_FILE.name, read_state().get(coll, [])
+        return
+    manifest = read_manifest()
+    names = manifest["collections"].get(coll, [])
+    for name in sorted(names, key=order) if order else names:
+        yield name, [_PATCHERS[coll](r) for r in read_shard(name, manifest)]
+
+def load_state() -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Read the data for a new session. An unreadable data.json counts as empty,
+    but project read errors (e.g. a shard not matching the manifest) are
+    raised: taken for an empty project, the next save would delete the shards.
+    """
+    _ensure_dir()
+    try:
+        with file_lock(shared=True):
+            return read_state()
+    except Exception:
+        if _is_project():
+            raise
     # If file missing or unreadable, return empty state with new fields
     return {
         "characters": [],
@@ -72,9 +269,44 @@ def load_state() -> Dict[str, List[Dict[str, Any]]]:
         "events": []
     }
 
-def save_state(state: Dict[str, List[Dict[str, Any]]]) -> None:
+def write_state(state: Dict[str, List[Dict[str, Any]]]) -> None:
+    """Write the data atomically, in whichever format is in use. The caller is expected to hold file_lock()."""
     _ensure_dir()
-    DATA_FILE.write_text(
-        json.dumps(state, indent=2, ensure_ascii=False),
-        encoding="utf-8",
-    )
\ No newline at end of file
+    if _is_project():
+        write_project(state)
+    else:
+        _atomic_write(DATA_FILE, _dump(state))
+
+def save_state(state: Dict[str, List[Dict[str, Any]]]) -> None:
+    with file_lock():
+        write_state(state)
+
+def convert_to_project() -> None:
+    """Switch from data/data.json to the sharded project directory (keeps data.json.bak)."""
+    with file_lock():
+        state = read_state()
+        if _is_project():
+            return
+        write_project(state)
+        if DATA_FILE.exists():
+            os.replace(DATA_FILE, DATA_FILE.with_name(DATA_FILE.name + ".bak"))
+
+def convert_to_file() -> None:
+    """Switch from the project directory back to data/data.json (keeps project.bak/)."""
+    with file_lock():
+        if not _is_project():
+            return
+        state = read_project()
+        _atomic_write(DATA_FILE, _dump(state))
+        backup = PROJECT_DIR.with_name(PROJECT_DIR.name + ".bak")
+        shutil.rmtree(backup, ignore_errors=True)
+        os.replace(PROJECT_DIR, backup)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert between data/data.json and the sharded data/project/ format.")
+    parser.add_argument("format", choices=["project", "file"])
+    args = parser.parse_args()
+    if args.format == "project":
+        convert_to_project()
+    else:
+        convert_to_file()
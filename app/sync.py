@@ -0,0 +1,90 @@
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+# Which field identifies a record inside each collection (names/titles are unique per collection)
+COLLECTIONS = {
+    "characters": "name",
+    "places": "name",
+    "events": "title",
+}
+
+Hashes = Dict[str, Dict[str, str]]
+
+def record_key(collection: str, record: Dict[str, Any]) -> str:
+    return str(record.get(COLLECTIONS[collection], "")).lower()
+
+def record_hash(record: Dict[str, Any]) -> str:
+    raw = json.dumps(record, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+def hash_state(state: Dict[str, List[Dict[str, Any]]]) -> Hashes:
+    """Per-record content hashes, grouped by collection and keyed by record key."""
+    return {
+        coll: {record_key(coll, r): record_hash(r) for r in state.get(coll, [])}
+        for coll in COLLECTIONS
+    }
+
+@dataclass
+class MergeResult:
+    state: Dict[str, List[Dict[str, Any]]]
+    # Remote changes that were taken into the merged state (to patch the open session with)
+    changed: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)
+    removed: Dict[str, List[str]] = field(default_factory=dict)
+    # (collection, key) pairs that were edited differently on both sides
+    conflicts: List[Tuple[str, str]] = field(default_factory=list)
+
+def merge_states(
+    base: Hashes,
+    local: Dict[str, List[Dict[str, Any]]],
+    remote: Dict[str, List[Dict[str, Any]]],
+    prefer_local: Optional[bool] = True,
+) -> MergeResult:
+    """
+    Three-way merge of two states against the hashes of the last synced version.
+    A record only changed on one side takes that side's version. A record changed
+    on both sides is a conflict: it keeps the local version when prefer_local is
+    True, the remote one when False, and is left as local (but reported) when None.
+    """
+    # Project-wide settings (e.g. the calendar) are not merged per record; the open session's win
+    merged: Dict[str, Any] = {k: v for k, v in local.items() if k not in COLLECTIONS}
+    result = MergeResult(state=merged)
+    for coll in COLLECTIONS:
+        base_h = base.get(coll, {})
+        local_recs = {record_key(coll, r): r for r in local.get(coll, [])}
+        remote_recs = {record_key(coll, r): r for r in remote.get(coll, [])}
+        local_h = {k: record_hash(r) for k, r in local_recs.items()}
+        remote_h = {k: record_hash(r) for k, r in remote_recs.items()}
+        changed: List[Dict[str, Any]] = []
+        removed: List[str] = []
+
+        take: Dict[str, Optional[Dict[str, Any]]] = {}
+        for key in set(local_h) | set(remote_h):
+            b, lo, re = base_h.get(key), local_h.get(key), remote_h.get(key)
+            if re == b or lo == re:
+                take[key] = local_recs.get(key)
+                continue
+            if lo == b:
+                take[key] = remote_recs.get(key)
+            else:
+                result.conflicts.append((coll, key))
+                if prefer_local is False:
+                    take[key] = remote_recs.get(key)
+                else:
+                    take[key] = local_recs.get(key)
+                    continue
+            if take[key] is None:
+                removed.append(key)
+            else:
+                changed.append(take[key])
+
+        # Keep the local ordering and append records that only exist remotely
+        out = [take[k] for k in local_recs if take.get(k) is not None]
+        out += [r for k, r in remote_recs.items() if k not in local_recs and take.get(k) is not None]
+        merged[coll] = out
+        if changed:
+            result.changed[coll] = changed
+        if removed:
+            result.removed[coll] = removed
+    return result
@@ -0,0 +1,115 @@
+from __future__ import annotations
+import math
+from typing import Callable, Dict, List
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QGraphicsView, QGraphicsScene, QTableWidget, QTableWidgetItem, QSplitter, QLabel
+)
+from PySide6.QtGui import QColor, QPen, QBrush, QFont, QPainter
+from PySide6.QtCore import Qt
+from ..analytics import RelationshipStats
+from ..calendars import current
+from ..models import Character
+
+class RelationshipGraphWidget(QGraphicsView):
+    """
+    Characters placed on a circle; an edge's width grows with the number of
+    events the two characters share.
+    """
+    RADIUS = 160
+    NODE_SIZE = 28
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setScene(QGraphicsScene(self))
+        self.setRenderHint(QPainter.Antialiasing)
+        self._font = QFont()
+        self._font.setPointSize(10)
+
+    def draw(self, stats: RelationshipStats, colors: Dict[str, str]):
+        self.scene().clear()
+        names, co = stats.co_occurrence()
+        shown = [i for i in range(len(names)) if co[i, i] > 0]
+        if not shown:
+            return
+        top = max(1, int(co[shown][:, shown].max()))
+        pos = {}
+        for k, i in enumerate(shown):
+            angle = 2 * math.pi * k / len(shown)
+            pos[i] = (self.RADIUS * math.cos(angle), self.RADIUS * math.sin(angle))
+        for a in range(len(shown)):
+            for b in range(a + 1, len(shown)):
+                i, j = shown[a], shown[b]
+                if co[i, j] <= 0:
+                    continue
+                (x1, y1), (x2, y2) = pos[i], pos[j]
+                line = self.scene().addLine(x1, y1, x2, y2, QPen(QColor("#666"), 1 + 7 * co[i, j] / top))
+                line.setToolTip(f"{names[i]} & {names[j]}: {co[i, j]} events")
+        for i in shown:
+            x, y = pos[i]
+            r = self.NODE_SIZE / 2
+            node = self.scene().addEllipse(x - r, y - r, self.NODE_SIZE, self.NODE_SIZE,
+                                           QPen(Qt.black, 1), QBrush(QColor(colors.get(names[i], "#999"))))
+            first, last = stats.first[i], stats.last[i]
+            span = f", {current().label(first)} – {current().label(last)}" if first is not None else ""
+            node.setToolTip(f"{names[i]}: {co[i, i]} events{span}")
+            label = self.scene().addText(names[i], self._font)
+            label.setPos(x + r, y - r)
+
+class RelationshipsTab(QWidget):
+    """
+    Tab with the character relationship graph and a character x place heat map,
+    including each character's first and last appearance.
+    """
+    def __init__(self, stats: RelationshipStats, get_characters_fn: Callable[[], List[Character]]):
+        super().__init__()
+        self.stats = stats
+        self.get_characters_fn = get_characters_fn
+        self._dirty = True
+        self.graph = RelationshipGraphWidget()
+        self.heatmap = QTableWidget()
+        self.heatmap.setEditTriggers(QTableWidget.NoEditTriggers)
+
+        splitter = QSplitter(Qt.Vertical)
+        splitter.addWidget(self.graph)
+        splitter.addWidget(self.heatmap)
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("Characters linked by shared events (hover for counts)"))
+        layout.addWidget(splitter)
+
+    def mark_dirty(self):
+        """Redraw now if visible, otherwise the next time the tab is shown."""
+        self._dirty = True
+        if self.isVisible():
+            self.refresh()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self._dirty:
+            self.refresh()
+
+    def refresh(self):
+        self._dirty = False
+        colors = {c.name: c.color for c in self.get_characters_fn()}
+        self.graph.draw(self.stats, colors)
+
+        chars, places, counts = self.stats.presence()
+        _, co = self.stats.co_occurrence()
+        rows = [i for i in range(len(chars)) if co[i, i] > 0]
+        cols = [j for j in range(len(places)) if counts[:, j].any()]
+        self.heatmap.clear()
+        self.heatmap.setRowCount(len(rows))
+        self.heatmap.setColumnCount(len(cols) + 2)
+        self.heatmap.setHorizontalHeaderLabels([places[j] for j in cols] + ["First seen", "Last seen"])
+        self.heatmap.setVerticalHeaderLabels([chars[i] for i in rows])
+        top = max(1, int(counts[rows][:, cols].max())) if rows and cols else 1
+        for r, i in enumerate(rows):
+            for c, j in enumerate(cols):
+                n = int(counts[i, j])
+                item = QTableWidgetItem(str(n) if n else "")
+                item.setTextAlignment(Qt.AlignCenter)
+                # White for zero, deepening red with the count
+                shade = 255 - int(200 * n / top)
+                item.setBackground(QColor(255, shade, shade))
+                self.heatmap.setItem(r, c, item)
+            for c, day in ((len(cols), self.stats.first[i]), (len(cols) + 1, self.stats.last[i])):
+                self.heatmap.setItem(r, c, QTableWidgetItem("" if day is None else current().label(day)))
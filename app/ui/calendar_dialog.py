@@ -0,0 +1,60 @@
+from __future__ import annotations
+from PySide6.QtWidgets import QDialog, QDialogButtonBox, QGridLayout, QComboBox, QLineEdit, QLabel
+from ..calendars import Calendar, CustomCalendar, GregorianCalendar
+
+def _pairs(text: str):
+    """'Name:number, Name:number' -> [(name, number), ...]"""
+    out = []
+    for part in text.split(","):
+        if not part.strip():
+            continue
+        name, sep, number = part.rpartition(":")
+        if not sep or not name.strip():
+            raise ValueError(f"expected Name:number, got {part.strip()!r}")
+        out.append((name.strip(), int(number)))
+    return out
+
+class CalendarDialog(QDialog):
+    """
+    Pick the project's calendar: Gregorian, or a custom one given as month
+    lengths ('Hammer:30, Alturiak:30, …') and optional eras ('DR:1, …').
+    """
+    def __init__(self, calendar: Calendar, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Calendar")
+        self.kind = QComboBox()
+        self.kind.addItems(["Gregorian", "Custom"])
+        self.months_edit = QLineEdit()
+        self.months_edit.setPlaceholderText("Month:days, Month:days, …")
+        self.eras_edit = QLineEdit()
+        self.eras_edit.setPlaceholderText("Era:first year, … (optional)")
+        if isinstance(calendar, CustomCalendar):
+            self.kind.setCurrentIndex(1)
+            self.months_edit.setText(", ".join(f"{name}:{n}" for name, n in calendar.months))
+            self.eras_edit.setText(", ".join(f"{name}:{start}" for name, start in calendar.eras))
+        self.kind.currentIndexChanged.connect(self._update_enabled)
+        self._update_enabled()
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+
+        form = QGridLayout(self)
+        form.addWidget(QLabel("Calendar"), 0, 0)
+        form.addWidget(self.kind, 0, 1)
+        form.addWidget(QLabel("Months"), 1, 0)
+        form.addWidget(self.months_edit, 1, 1)
+        form.addWidget(QLabel("Eras"), 2, 0)
+        form.addWidget(self.eras_edit, 2, 1)
+        form.addWidget(buttons, 3, 0, 1, 2)
+
+    def _update_enabled(self):
+        custom = self.kind.currentIndex() == 1
+        self.months_edit.setEnabled(custom)
+        self.eras_edit.setEnabled(custom)
+
+    def calendar(self) -> Calendar:
+        """The chosen calendar. Raises ValueError if the custom fields don't parse."""
+        if self.kind.currentIndex() == 0:
+            return GregorianCalendar()
+        return CustomCalendar(_pairs(self.months_edit.text()), _pairs(self.eras_edit.text()))
@@ -0,0 +1,361 @@
+from __future__ import annotations
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional
+from PySide6.QtCore import QModelIndex, QObject, QStringListModel, QTimer, Signal
+from PySide6.QtWidgets import QLineEdit, QListView
+from ..search import NameIndex, name_matches
+
+class NameListModel(QObject):
+    """
+    The names in a tab's list, one row per record. Each row also gets a key
+    that stays the same while rows around it come and go (for NameIndex).
+    Its signals aren't the list's own, so they still arrive while a tab blocks
+    the list's signals.
+    """
+    inserted = Signal(int)
+    aboutToRemove = Signal(int)
+    renamed = Signal(int)
+
+    def __init__(self, names: Iterable[str] = ()):
+        super().__init__()
+        self.names: List[str] = list(names)
+        self.keys: List[int] = list(range(len(self.names)))
+        self._next_key = len(self.names)
+        # key -> row; only entries below _valid are sure to be right, the rest are
+        # fixed by fix_rows (inserting or taking a row shifts those after it)
+        self._row_of: Dict[int, int] = {key: row for row, key in enumerate(self.keys)}
+        self._valid = len(self.keys)
+
+    def insert(self, row: int, name: str):
+        self.names.insert(row, name)
+        self.keys.insert(row, self._next_key)
+        self._row_of[self._next_key] = row
+        if self._valid == row:
+            self._valid += 1  # appended: nothing moved
+        else:
+            self._valid = min(self._valid, row)
+        self._next_key += 1
+        self.inserted.emit(row)
+
+    def remove(self, row: int):
+        self.aboutToRemove.emit(row)
+        del self._row_of[self.keys[row]]
+        del self.names[row]
+        del self.keys[row]
+        self._valid = min(self._valid, row)
+
+    def rename(self, row: int, name: str):
+        self.names[row] = name
+        self.renamed.emit(row)
+
+    def fix_rows(self, deadline: Optional[float] = None) -> bool:
+        """Bring the key -> row map up to date, or as far as time allows before deadline; True when done."""
+        keys, row_of = self.keys, self._row_of
+        while self._valid < len(keys):
+            row_of[keys[self._valid]] = self._valid
+            self._valid += 1
+            if deadline is not None and self._valid % 1024 == 0 and time.perf_counter() > deadline:
+                break
+        return self._valid == len(keys)
+
+    def rows(self, keys: Iterable[int]) -> List[int]:
+        """Sorted rows of keys, in time for the number of keys once fix_rows has caught up."""
+        self.fix_rows()
+        return sorted(map(self._row_of.__getitem__, keys))
+
+class NameList(QListView):
+    """
+    List of a tab's record names, with the part of QListWidget's API the tabs
+    use. Rows are always those of the tab's records, also while a filter hides
+    some of them; a current row that gets filtered out stays current, so the
+    form keeps showing (and saving to) its record.
+
+    The view shows a plain QStringListModel of the visible names, so laying
+    out 100k rows after a keystroke stays in Qt instead of calling back into
+    Python for every row; rows maps its rows to the record rows.
+    """
+    currentRowChanged = Signal(int)
+
+    def __init__(self, names: Iterable[str] = (), parent=None):
+        super().__init__(parent)
+        self.source = NameListModel(names)
+        self.shown = QStringListModel(self.source.names)
+        self.rows: Optional[List[int]] = None  # None: everything is shown
+        self.accepts: Callable[[int], bool] = lambda row: True
+        self._current = -1
+        self._syncing = False
+        self.setModel(self.shown)
+        self.setUniformItemSizes(True)
+        self.setSelectionMode(QListView.SingleSelection)
+        self.setEditTriggers(QListView.NoEditTriggers)
+        self.selectionModel().currentChanged.connect(self._view_current_changed)
+
+    def count(self) -> int:
+        return len(self.source.names)
+
+    def text(self, row: int) -> str:
+        return self.source.names[row]
+
+    def addItem(self, name: str):
+        self.insertItem(self.count(), name)
+
+    def insertItem(self, row: int, name: str):
+        self.source.insert(row, name)
+        if self._current >= row:
+            self._current += 1
+        if self.rows is not None:
+            pos = bisect_left(self.rows, row)
+            self.rows[pos:] = [r + 1 for r in self.rows[pos:]]
+            if not self.accepts(row):
+                return
+            self.rows.insert(pos, row)
+        else:
+            pos = row
+        self._show_row(pos, name)
+
+    def takeItem(self, row: int):
+        pos = self._pos(row)
+        if pos >= 0:
+            # Like QListWidget, a taken current row hands over to a neighbour (reported by its row before the removal)
+            self.shown.removeRows(pos, 1)
+            if self.rows is not None:
+                del self.rows[pos]
+        if self.rows is not None:
+            pos = bisect_left(self.rows, row)
+            self.rows[pos:] = [r - 1 for r in self.rows[pos:]]
+        self.source.remove(row)
+        if self._current == row:
+            self._current = -1
+            self.currentRowChanged.emit(-1)
+        elif self._current > row:
+            self._current -= 1
+
+    def setText(self, row: int, name: str):
+        if self.source.names[row] == name:
+            return
+        self.source.rename(row, name)
+        pos = self._pos(row)
+        if self.rows is None or (pos >= 0 and self.accepts(row)):
+            self.shown.setData(self.shown.index(pos), name)
+        elif pos >= 0:
+            self._syncing = True
+            try:
+                self.shown.removeRows(pos, 1)
+            finally:
+                self._syncing = False
+            del self.rows[pos]
+            self._show_current()
+        elif self.accepts(row):
+            pos = bisect_left(self.rows, row)
+            self.rows.insert(pos, row)
+            self._show_row(pos, name)
+            self._show_current()
+
+    def currentRow(self) -> int:
+        return self._current
+
+    def setCurrentRow(self, row: int):
+        self._set_current(row if 0 <= row < self.count() else -1)
+        self._show_current()
+
+    def set_rows(self, rows: Optional[List[int]]):
+        """Show only the records in rows (sorted), or all of them for None."""
+        self.rows = rows
+        names = self.source.names
+        self._syncing = True
+        try:
+            self.shown.setStringList(names if rows is None else [names[row] for row in rows])
+        finally:
+            self._syncing = False
+        self._show_current()
+
+    def append_rows(self, rows: List[int]):
+        """Show the records in rows (sorted) as well; they come after every row shown so far."""
+        if not rows or self.rows is None:
+            return
+        pos = len(self.rows)
+        self.rows.extend(rows)
+        names = self.source.names
+        self._syncing = True
+        try:
+            self.shown.insertRows(pos, len(rows))
+            for i, row in enumerate(rows, pos):
+                self.shown.setData(self.shown.index(i), names[row])
+        finally:
+            self._syncing = False
+        self._show_current()
+
+    def first_shown(self) -> int:
+        """Row of the topmost record the filter lets through, or -1."""
+        if not self.shown.rowCount():
+            return -1
+        return 0 if self.rows is None else self.rows[0]
+
+    def _pos(self, row: int) -> int:
+        """Position of record row in the view, or -1 when it's filtered out."""
+        if self.rows is None:
+            return row
+        pos = bisect_left(self.rows, row)
+        return pos if pos < len(self.rows) and self.rows[pos] == row else -1
+
+    def _show_row(self, pos: int, name: str):
+        self._syncing = True
+        try:
+            self.shown.insertRows(pos, 1)
+            self.shown.setData(self.shown.index(pos), name)
+        finally:
+            self._syncing = False
+
+    def _show_current(self):
+        pos = self._pos(self._current) if self._current >= 0 else -1
+        index = self.shown.index(pos) if pos >= 0 else QModelIndex()
+        if index != self.currentIndex():
+            self._syncing = True
+            try:
+                self.setCurrentIndex(index)
+            finally:
+                self._syncing = False
+
+    def _set_current(self, row: int):
+        if row != self._current:
+            self._current = row
+            self.currentRowChanged.emit(row)
+
+    def _view_current_changed(self, current: QModelIndex, _previous=None):
+        # No current row in the view means filtered out or taken away; takeItem covers the latter
+        if not self._syncing and current.isValid():
+            pos = current.row()
+            self._set_current(pos if self.rows is None else self.rows[pos])
+
+class ListFilterEdit(QLineEdit):
+    """
+    Type-ahead filter box for a NameList. The list shows only the matching
+    rows, while its row numbers keep matching the tab's data list.
+
+    The NameIndex follows the list's names (rows inserted, taken or renamed),
+    so tabs keep adding, taking and renaming items as before. It is filled in
+    idle-time slices of at most FRAME_BUDGET seconds after startup. A
+    keystroke only asks the index, so it costs time in proportion to the
+    matches, not the list; rows the index hasn't reached yet are matched by
+    name in the same kind of slices and added to the list as they're found.
+    """
+    FRAME_BUDGET = 0.008
+
+    def __init__(self, name_list: NameList, placeholder: str = "Filter…", parent=None):
+        super().__init__(parent)
+        self.list = name_list
+        self.model = name_list.source
+        self.setPlaceholderText(placeholder)
+        self.setClearButtonEnabled(True)
+        self._index = NameIndex()
+        self._built = 0  # rows [0, _built) are in the index
+        self._query = ""  # the filter, stripped and casefolded
+        self._scanned = len(self.model.names)  # rows from here on aren't checked against _query yet
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._build_some)
+        self.model.inserted.connect(self._row_inserted)
+        self.model.aboutToRemove.connect(self._row_removed)
+        self.model.renamed.connect(self._row_renamed)
+        self.list.accepts = self._accepts
+        self.textChanged.connect(self._filter)
+        self.returnPressed.connect(self._select_first)
+        self._timer.start(0)
+
+    def _build(self, deadline: Optional[float]):
+        names, keys = self.model.names, self.model.keys
+        while self._built < len(names):
+            self._index.add(keys[self._built], names[self._built])
+            self._built += 1
+            if deadline is not None and self._built % 64 == 0 and time.perf_counter() > deadline:
+                break
+
+    def find_row(self, name: str, exclude: int = -1) -> int:
+        """Row of an item named name (ignoring case) other than row exclude, or -1."""
+        target = name.strip().casefold()
+        for row in self.model.rows(self._index.find(target)):
+            if row != exclude:
+                return row
+        # Rows the background build hasn't reached yet are compared directly
+        names = self.model.names
+        for row in range(self._built, len(names)):
+            if row != exclude and names[row].casefold() == target:
+                return row
+        return -1
+
+    def _accepts(self, row: int) -> bool:
+        if row >= self._scanned:
+            return False  # _scan_some gets to it
+        return not self._query or name_matches(self.model.names[row].casefold(), self._query)
+
+    def _row_inserted(self, row: int):
+        self._timer.start(0)  # e.g. to fix the rows of the keys after it
+        if row <= self._scanned:
+            self._scanned += 1  # the list checks it with _accepts
+        if row <= self._built:
+            self._index.add(self.model.keys[row], self.model.names[row])
+            self._built += 1
+        # else the background build gets to it
+
+    def _row_removed(self, row: int):
+        self._timer.start(0)
+        if row < self._scanned:
+            self._scanned -= 1
+        if row < self._built:
+            self._index.remove(self.model.keys[row])
+            self._built -= 1
+
+    def _row_renamed(self, row: int):
+        if row < self._built:
+            self._index.rename(self.model.keys[row], self.model.names[row])
+
+    def _filter(self, text: str):
+        query = text.strip().casefold()
+        if query == self._query:
+            return
+        self._query = query
+        if not query:
+            self._scanned = len(self.model.names)
+            self.list.set_rows(None)
+            return
+        self._scanned = self._built
+        self.list.set_rows(self.model.rows(self._index.search(query)))
+        if self._scanned < len(self.model.names):
+            self._scan_some(time.perf_counter() + self.FRAME_BUDGET)
+            self._timer.start(0)
+
+    def _scan_some(self, deadline: float):
+        names, query, new = self.model.names, self._query, []
+        while self._scanned < len(names):
+            if name_matches(names[self._scanned].casefold(), query):
+                new.append(self._scanned)
+            self._scanned += 1
+            if len(new) == 64:
+                # Showing rows costs more than checking them, so it counts towards the budget as it goes
+                self.list.append_rows(new)
+                new = []
+            elif self._scanned % 256:
+                continue
+            if time.perf_counter() > deadline:
+                break
+        self.list.append_rows(new)
+
+    def _build_some(self):
+        # Finishing the rows shown for the current filter comes first, then what the next keystroke needs
+        deadline = time.perf_counter() + self.FRAME_BUDGET
+        count = len(self.model.names)
+        fixed = True
+        if self._query and self._scanned < count:
+            self._scan_some(deadline)
+        else:
+            fixed = self.model.fix_rows(deadline)
+            if fixed:
+                self._build(deadline)
+        if not fixed or self._built < count or (self._query and self._scanned < count):
+            self._timer.start(0)  # let the event loop run, then continue
+
+    def _select_first(self):
+        row = self.list.first_shown()
+        if row >= 0:
+            self.list.setCurrentRow(row)
@@ -2,43 +2,152 @@ from __future__ import annotations
 from dataclasses import asdict
 from typing import List
 import os
-from PySide6.QtCore import Qt,QDate, Signal
+from PySide6.QtCore import Qt, Signal
 from PySide6.QtGui import QColor, QPixmap, QIcon
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QListWidget, QListWidgetItem,
     QLineEdit, QTextEdit, QPushButton, QLabel, QMessageBox, QColorDialog,
-    QFileDialog, QListView, QInputDialog, QDialog, QDialogButtonBox, QGridLayout,
-    QDateEdit
+    QFileDialog, QListView, QInputDialog, QDialog, QDialogButtonBox, QGridLayout
 )
+from ..assets import default_store
+from ..calendars import current
 from ..models import Character, Place, Event
+from .list_filter import ListFilterEdit, NameList
 
 def _shorten(text: str, max_len: int = 60) -> str:
     text = (text or "").replace("\n", " ")
     return text if len(text) <= max_len else text[: max_len - 1] + "…"
 
-def _add_image_item(images_list, img_path):
-    full_path = os.path.join(os.getcwd(), img_path)
-    item = QListWidgetItem(os.path.basename(img_path))
-    if os.path.exists(full_path):
-        icon = QIcon(full_path)
+# Thumbnails keyed by image entry; asset refs are content hashes, so they never go stale
+_icons = {}
+
+def _add_image_item(images_list, image):
+    store = default_store()
+    item = QListWidgetItem(store.display_name(image))
+    icon = _icons.get(image)
+    if icon is None:
+        path = store.path(image)
+        if path is not None and path.exists():
+            icon = _icons[image] = QIcon(str(path))
+    if icon is not None:
         item.setIcon(icon)
-    item.setToolTip(img_path)
+    item.setToolTip(image)
     images_list.addItem(item)
 
-class CharactersTab(QWidget):
+class RecordListMixin:
+    """
+    Row-level updates shared by the characters, places and events tabs. A tab
+    sets record_type (its model class), records_attr (the attribute holding its
+    list of records) and key_field (the field records are identified by, in
+    lowercase), and provides list, _on_select, _save_current and record_changed.
+    """
+    record_type = None
+    records_attr = ""
+    key_field = "name"
+
+    @property
+    def records(self) -> list:
+        return getattr(self, self.records_attr)
+
+    def _key(self, record) -> str:
+        return getattr(record, self.key_field).lower()
+
+    def _reject(self, quiet: bool, title: str, text: str):
+        # Background flushes (see MainWindow._reload_external) leave invalid input in the form, without a popup
+        if not quiet:
+            QMessageBox.warning(self, title, text)
+
+    def values(self, quiet: bool = False) -> list:
+        """Save the open form, then return the records. With quiet, invalid input is kept unsaved silently."""
+        self._save_current(quiet)
+        return self.records
+
+    def apply_changes(self, changed: List[dict], removed: List[str]):
+        """
+        Patch in records changed by another process, touching only the affected
+        rows. The open form is reloaded only if its own record changed or went away.
+        """
+        records = self.records
+        current = self.list.currentRow()
+        current_key = self._key(records[current]) if 0 <= current < len(records) else None
+        gone = set(removed)
+        touched = gone | {str(rec.get(self.key_field, "")).lower() for rec in changed}
+        # Rows moving around must not reload the form (and drop what is being typed there)
+        blocked = self.list.blockSignals(True)
+        try:
+            for row in reversed(range(len(records))):
+                if self._key(records[row]) in gone:
+                    self.list.takeItem(row)
+                    old = records.pop(row)
+                    self.record_changed.emit(old, None, row)
+            rows = {self._key(x): i for i, x in enumerate(records)}
+            for rec in changed:
+                x = self.record_type(**rec)
+                row = rows.get(self._key(x))
+                if row is None:
+                    records.append(x)
+                    self.record_changed.emit(None, x, len(records) - 1)
+                    self.list.addItem(getattr(x, self.key_field))
+                else:
+                    old, records[row] = records[row], x
+                    self.record_changed.emit(old, x, row)
+                    self.list.setText(row, getattr(x, self.key_field))
+            row = self._row_of(current_key) if current_key is not None else -1
+            self.list.setCurrentRow(row if row >= 0 else (0 if records else -1))
+        finally:
+            self.list.blockSignals(blocked)
+        if row < 0 or current_key in touched:
+            self._on_select(self.list.currentRow())
+
+    def _row_of(self, key: str) -> int:
+        return next((i for i, x in enumerate(self.records) if self._key(x) == key), -1)
+
+    def patch_record(self, key: str, values: dict):
+        """Set some fields of one record (found by its lowercased key), updating only its row."""
+        row = self._row_of(key)
+        if row < 0:
+            return
+        x = self.records[row]
+        before = self.record_type(**asdict(x))
+        for field_name, value in values.items():
+            setattr(x, field_name, value)
+        self.list.setText(row, getattr(x, self.key_field))
+        if row == self.list.currentRow():
+            self._on_select(row)
+        self.record_changed.emit(before, x, row)
+
+    def insert_record(self, row: int, values: dict):
+        x = self.record_type(**values)
+        row = min(row, len(self.records))
+        self.records.insert(row, x)
+        self.list.insertItem(row, getattr(x, self.key_field))
+        self.record_changed.emit(None, x, row)
+
+    def remove_record(self, key: str):
+        row = self._row_of(key)
+        if row < 0:
+            return
+        current = self.list.currentRow()
+        self.list.takeItem(row)  # before the pop, see _delete_selected
+        x = self.records.pop(row)
+        if current == row:
+            self.list.setCurrentRow(min(row, len(self.records) - 1))
+        self.record_changed.emit(x, None, row)
+
+class CharactersTab(RecordListMixin, QWidget):
     """
     A full-featured characters tab: select a character and edit all fields.
     """
     data_changed = Signal()
+    record_changed = Signal(object, object, int)  # (before, after, row); None when added/removed
+    record_type, records_attr, key_field = Character, "chars", "name"
 
     def __init__(self, initial_chars: List[Character]):
         super().__init__()
         self.chars: List[Character] = [Character(**asdict(c)) if not isinstance(c, Character) else c for c in initial_chars]
-        self.list = QListWidget()
-        self.list.setSelectionMode(QListWidget.SingleSelection)
-        for c in self.chars:
-            self.list.addItem(QListWidgetItem(c.name))
+        self.list = NameList(c.name for c in self.chars)
         self.list.currentRowChanged.connect(self._on_select)
+        self.filter_edit = ListFilterEdit(self.list, "Filter characters…")
 
         add_btn = QPushButton("Add Character")
         del_btn = QPushButton("Delete selected")
@@ -83,6 +192,7 @@ class CharactersTab(QWidget):
         form.addWidget(self.save_btn, 9, 0, 1, 2)
 
         left = QVBoxLayout()
+        left.addWidget(self.filter_edit)
         left.addWidget(self.list)
         left.addWidget(add_btn)
         left.addWidget(del_btn)
@@ -109,26 +219,28 @@ class CharactersTab(QWidget):
         for img in c.images:
             _add_image_item(self.images_list, img)
 
-    def _save_current(self):
+    def _save_current(self, quiet: bool = False):
         row = self.list.currentRow()
         if row < 0 or row >= len(self.chars):
             return
         name = self.name_edit.text().strip()
         if not name:
-            QMessageBox.warning(self, "Missing name", "Name cannot be empty.")
+            self._reject(quiet, "Missing name", "Name cannot be empty.")
+            return
+        # Check for duplicate names (only needed when it changed)
+        if name.lower() != self.chars[row].name.lower() and self.filter_edit.find_row(name, exclude=row) >= 0:
+            self._reject(quiet, "Duplicate", "Another character has this name.")
             return
-        # Check for duplicate names
-        for i, cc in enumerate(self.chars):
-            if i != row and cc.name.lower() == name.lower():
-                QMessageBox.warning(self, "Duplicate", "Another character has this name.")
-                return
         c = self.chars[row]
+        before = Character(**asdict(c))
         c.name = name
         c.description = self.desc_edit.toPlainText()
         c.color = self.color_btn.text()
         c.texts = [self.texts_list.item(i).text() for i in range(self.texts_list.count())]
         c.images = [self.images_list.item(i).toolTip() for i in range(self.images_list.count())]
-        self.list.item(row).setText(c.name)
+        self.list.setText(row, c.name)
+        if asdict(c) != asdict(before):
+            self.record_changed.emit(before, c, row)
         self.data_changed.emit()
 
     def _clear_details(self):
@@ -143,12 +255,13 @@ class CharactersTab(QWidget):
         name, ok = QInputDialog.getText(self, "Add Character", "Character name?")
         if not ok or not name.strip():
             return
-        if any(c.name.lower() == name.strip().lower() for c in self.chars):
+        if self.filter_edit.find_row(name) >= 0:
             QMessageBox.warning(self, "Duplicate", "Character already exists.")
             return
         c = Character(name=name.strip())
         self.chars.append(c)
-        self.list.addItem(QListWidgetItem(c.name))
+        self.record_changed.emit(None, c, len(self.chars) - 1)
+        self.list.addItem(c.name)
         self.list.setCurrentRow(self.list.count() - 1)
         self.data_changed.emit()
 
@@ -156,9 +269,11 @@ class CharactersTab(QWidget):
         row = self.list.currentRow()
         if row < 0 or row >= len(self.chars):
             return
-        self.chars.pop(row)
+        # Take the row first: that moves the current row, and the form loads the record there right away
         self.list.takeItem(row)
+        removed = self.chars.pop(row)
         self.list.setCurrentRow(0 if self.chars else -1)
+        self.record_changed.emit(removed, None, row)
         self.data_changed.emit()
 
     def _pick_color(self):
@@ -182,11 +297,12 @@ class CharactersTab(QWidget):
             os.makedirs(folder, exist_ok=True)
         file, _ = QFileDialog.getOpenFileName(self, "Select Image", folder, "Images (*.png *.jpg *.jpeg *.bmp *.gif);;All Files (*)")
         if file:
-            rel = os.path.relpath(file, os.getcwd())
-            if not rel.startswith("pictures/") and not rel.startswith("pictures\\"):
-                QMessageBox.warning(self, "Not in pictures/", "Please only add images from the 'pictures/' folder.")
+            try:
+                ref = default_store().import_file(file)
+            except OSError as e:
+                QMessageBox.warning(self, "Import failed", f"Could not import image: {e}")
                 return
-            _add_image_item(self.images_list, rel)
+            _add_image_item(self.images_list, ref)
             self.data_changed.emit()
 
     def _del_img(self):
@@ -194,24 +310,20 @@ class CharactersTab(QWidget):
             self.images_list.takeItem(self.images_list.row(item))
         self.data_changed.emit()
 
-    def values(self) -> List[Character]:
-        self._save_current()
-        return self.chars
-
-class PlacesTab(QWidget):
+class PlacesTab(RecordListMixin, QWidget):
     """
     A full-featured places tab: select a place and edit all fields.
     """
     data_changed = Signal()
+    record_changed = Signal(object, object, int)  # (before, after, row); None when added/removed
+    record_type, records_attr, key_field = Place, "places", "name"
 
     def __init__(self, initial_places: List[Place]):
         super().__init__()
         self.places: List[Place] = [Place(**asdict(p)) if not isinstance(p, Place) else p for p in initial_places]
-        self.list = QListWidget()
-        self.list.setSelectionMode(QListWidget.SingleSelection)
-        for p in self.places:
-            self.list.addItem(QListWidgetItem(p.name))
+        self.list = NameList(p.name for p in self.places)
         self.list.currentRowChanged.connect(self._on_select)
+        self.filter_edit = ListFilterEdit(self.list, "Filter places…")
 
         add_btn = QPushButton("Add Place")
         del_btn = QPushButton("Delete selected")
@@ -251,6 +363,7 @@ class PlacesTab(QWidget):
         form.addWidget(self.save_btn, 8, 0, 1, 2)
 
         left = QVBoxLayout()
+        left.addWidget(self.filter_edit)
         left.addWidget(self.list)
         left.addWidget(add_btn)
         left.addWidget(del_btn)
@@ -275,25 +388,27 @@ class PlacesTab(QWidget):
         for img in p.images:
             _add_image_item(self.images_list, img)
 
-    def _save_current(self):
+    def _save_current(self, quiet: bool = False):
         row = self.list.currentRow()
         if row < 0 or row >= len(self.places):
             return
         name = self.name_edit.text().strip()
         if not name:
-            QMessageBox.warning(self, "Missing name", "Name cannot be empty.")
+            self._reject(quiet, "Missing name", "Name cannot be empty.")
+            return
+        # Check for duplicate names (only needed when it changed)
+        if name.lower() != self.places[row].name.lower() and self.filter_edit.find_row(name, exclude=row) >= 0:
+            self._reject(quiet, "Duplicate", "Another place has this name.")
             return
-        # Check for duplicate names
-        for i, pp in enumerate(self.places):
-            if i != row and pp.name.lower() == name.lower():
-                QMessageBox.warning(self, "Duplicate", "Another place has this name.")
-                return
         p = self.places[row]
+        before = Place(**asdict(p))
         p.name = name
         p.description = self.desc_edit.toPlainText()
         p.texts = [self.texts_list.item(i).text() for i in range(self.texts_list.count())]
         p.images = [self.images_list.item(i).toolTip() for i in range(self.images_list.count())]
-        self.list.item(row).setText(p.name)
+        self.list.setText(row, p.name)
+        if asdict(p) != asdict(before):
+            self.record_changed.emit(before, p, row)
         self.data_changed.emit()
 
     def _clear_details(self):
@@ -306,12 +421,13 @@ class PlacesTab(QWidget):
         name, ok = QInputDialog.getText(self, "Add Place", "Place name?")
         if not ok or not name.strip():
             return
-        if any(p.name.lower() == name.strip().lower() for p in self.places):
+        if self.filter_edit.find_row(name) >= 0:
             QMessageBox.warning(self, "Duplicate", "Place already exists.")
             return
         p = Place(name=name.strip())
         self.places.append(p)
-        self.list.addItem(QListWidgetItem(p.name))
+        self.record_changed.emit(None, p, len(self.places) - 1)
+        self.list.addItem(p.name)
         self.list.setCurrentRow(self.list.count() - 1)
         self.data_changed.emit()
 
@@ -319,9 +435,11 @@ class PlacesTab(QWidget):
         row = self.list.currentRow()
         if row < 0 or row >= len(self.places):
             return
-        self.places.pop(row)
+        # Take the row first: that moves the current row, and the form loads the record there right away
         self.list.takeItem(row)
+        removed = self.places.pop(row)
         self.list.setCurrentRow(0 if self.places else -1)
+        self.record_changed.emit(removed, None, row)
         self.data_changed.emit()
 
     def _add_text(self):
@@ -339,11 +457,12 @@ class PlacesTab(QWidget):
             os.makedirs(folder, exist_ok=True)
         file, _ = QFileDialog.getOpenFileName(self, "Select Image", folder, "Images (*.png *.jpg *.jpeg *.bmp *.gif);;All Files (*)")
         if file:
-            rel = os.path.relpath(file, os.getcwd())
-            if not rel.startswith("pictures/") and not rel.startswith("pictures\\"):
-                QMessageBox.warning(self, "Not in pictures/", "Please only add images from the 'pictures/' folder.")
+            try:
+                ref = default_store().import_file(file)
+            except OSError as e:
+                QMessageBox.warning(self, "Import failed", f"Could not import image: {e}")
                 return
-            _add_image_item(self.images_list, rel)
+            _add_image_item(self.images_list, ref)
             self.data_changed.emit()
 
     def _del_img(self):
@@ -351,12 +470,7 @@ class PlacesTab(QWidget):
             self.images_list.takeItem(self.images_list.row(item))
         self.data_changed.emit()
 
-    def values(self) -> List[Place]:
-        # Save current edit if any
-        self._save_current()
-        return self.places
-
-# ListTab and EventsTab remain unchanged except for EventsTab _on_select/_add_img/_del_img using _add_image_item if you want thumbnails for Events as well.
+# ListTab and EventsTab remain unchanged; EventsTab shows thumbnails through _add_image_item too.
 
 class ListTab(QWidget):
     """Generic list tab for Characters and Places."""
@@ -409,21 +523,22 @@ class ListTab(QWidget):
         return [self.list.item(i).text() for i in range(self.list.count())]
 
 
-class EventsTab(QWidget):
+class EventsTab(RecordListMixin, QWidget):
     """
     Full-featured Events tab: add/edit all fields, associate characters/places, texts, images.
     """
+    record_changed = Signal(object, object, int)  # (before, after, row); None when added/removed
+    record_type, records_attr, key_field = Event, "events", "title"
+
     def __init__(self, initial_events: List[Event], characters: List[Character]=None, places: List[Place]=None):
         super().__init__()
         self.events: List[Event] = [Event(**asdict(e)) if not isinstance(e, Event) else e for e in initial_events]
         self.characters: List[str] = [c.name for c in (characters or [])]
         self.places: List[str] = [p.name for p in (places or [])]
 
-        self.list = QListWidget()
-        self.list.setSelectionMode(QListWidget.SingleSelection)
-        for e in self.events:
-            self.list.addItem(QListWidgetItem(e.title))
+        self.list = NameList(e.title for e in self.events)
         self.list.currentRowChanged.connect(self._on_select)
+        self.filter_edit = ListFilterEdit(self.list, "Filter events…")
 
         add_btn = QPushButton("Add Event")
         del_btn = QPushButton("Delete selected")
@@ -433,13 +548,11 @@ class EventsTab(QWidget):
         # Fields for event details
         self.title_edit = QLineEdit()
         self.desc_edit = QTextEdit()
-        self.start_date = QDateEdit()
-        self.start_date.setCalendarPopup(True)
-        self.start_date.setDisplayFormat("yyyy-MM-dd")
-        self.end_date = QDateEdit()
-        self.end_date.setCalendarPopup(True)
-        self.end_date.setDisplayFormat("yyyy-MM-dd")
-        self.end_date.setSpecialValueText("")
+        # Plain text so any calendar (negative years, custom months) can be entered; validated on save
+        self.start_date = QLineEdit()
+        self.start_date.setPlaceholderText("YYYY-MM-DD (e.g. -0043-03-15 for 44 BCE)")
+        self.end_date = QLineEdit()
+        self.end_date.setPlaceholderText("YYYY-MM-DD, empty for a single day")
 
         self.texts_list = QListWidget()
         self.add_text_btn = QPushButton("Add Note")
@@ -486,6 +599,7 @@ class EventsTab(QWidget):
         form.addWidget(self.save_btn, 12, 0, 1, 2)
 
         left = QVBoxLayout()
+        left.addWidget(self.filter_edit)
         left.addWidget(self.list)
         left.addWidget(add_btn)
         left.addWidget(del_btn)
@@ -509,12 +623,36 @@ class EventsTab(QWidget):
             self.place_list.addItem(item)
 
     def set_characters(self, characters: List[str]):
-        self.characters = characters
-        self._refresh_char_place_lists()
+        if characters != self.characters:
+            self.characters = characters
+            self._relist(self.char_list, characters)
 
     def set_places(self, places: List[str]):
-        self.places = places
-        self._refresh_char_place_lists()
+        if places != self.places:
+            self.places = places
+            self._relist(self.place_list, places)
+
+    def _relist(self, widget: QListWidget, names: List[str]):
+        # Keep what is ticked in the form, saved or not, rather than going back to the event's links
+        ticked = {item.text() for item in widget.selectedItems()}
+        widget.clear()
+        for name in names:
+            item = QListWidgetItem(name)
+            widget.addItem(item)
+            item.setSelected(name in ticked)
+
+    def _select_links(self):
+        # Re-select the current event's characters/places after the lists were rebuilt
+        row = self.list.currentRow()
+        if row < 0 or row >= len(self.events):
+            return
+        e = self.events[row]
+        for i in range(self.char_list.count()):
+            item = self.char_list.item(i)
+            item.setSelected(item.text() in e.characters)
+        for i in range(self.place_list.count()):
+            item = self.place_list.item(i)
+            item.setSelected(item.text() in e.places)
 
     def _on_select(self, row):
         if row < 0 or row >= len(self.events):
@@ -524,18 +662,8 @@ class EventsTab(QWidget):
         self.title_edit.setText(e.title)
         self.desc_edit.setPlainText(e.description)
         # Dates
-        try:
-            if e.start_date:
-                self.start_date.setDate(QDate.fromString(e.start_date, "yyyy-MM-dd"))
-            else:
-                self.start_date.setDate(QDate.currentDate())
-            if e.end_date:
-                self.end_date.setDate(QDate.fromString(e.end_date, "yyyy-MM-dd"))
-            else:
-                self.end_date.setDate(QDate.currentDate())
-        except Exception:
-            self.start_date.setDate(QDate.currentDate())
-            self.end_date.setDate(QDate.currentDate())
+        self.start_date.setText(e.start_date)
+        self.end_date.setText(e.end_date)
         # Texts
         self.texts_list.clear()
         for t in e.texts:
@@ -543,46 +671,51 @@ class EventsTab(QWidget):
         # Images
         self.images_list.clear()
         for img in e.images:
-            self.images_list.addItem(QListWidgetItem(img))
-        # Characters
+            _add_image_item(self.images_list, img)
+        # Characters and places
         self._refresh_char_place_lists()
-        for i in range(self.char_list.count()):
-            item = self.char_list.item(i)
-            item.setSelected(item.text() in e.characters)
-        # Places
-        for i in range(self.place_list.count()):
-            item = self.place_list.item(i)
-            item.setSelected(item.text() in e.places)
+        self._select_links()
 
-    def _save_current(self):
+    def _save_current(self, quiet: bool = False):
         row = self.list.currentRow()
         if row < 0 or row >= len(self.events):
             return
         title = self.title_edit.text().strip()
         if not title:
-            QMessageBox.warning(self, "Missing title", "Title cannot be empty.")
+            self._reject(quiet, "Missing title", "Title cannot be empty.")
+            return
+        # Check for duplicate titles (only needed when it changed)
+        if title.lower() != self.events[row].title.lower() and self.filter_edit.find_row(title, exclude=row) >= 0:
+            self._reject(quiet, "Duplicate", "Another event has this title.")
+            return
+        cal = current()
+        start_text, end_text = self.start_date.text().strip(), self.end_date.text().strip()
+        start, end = cal.parse(start_text), cal.parse(end_text)
+        if (start_text and start is None) or (end_text and end is None):
+            self._reject(quiet, "Invalid date", "Dates must be written YYYY-MM-DD and exist in the project's calendar.")
+            return
+        if end is not None and (start is None or end < start):
+            self._reject(quiet, "Invalid date", "The end date must come after the start date.")
             return
-        # Check for duplicate titles
-        for i, ee in enumerate(self.events):
-            if i != row and ee.title.lower() == title.lower():
-                QMessageBox.warning(self, "Duplicate", "Another event has this title.")
-                return
         e = self.events[row]
+        before = Event(**asdict(e))
         e.title = title
         e.description = self.desc_edit.toPlainText()
-        e.start_date = self.start_date.date().toString("yyyy-MM-dd")
-        e.end_date = self.end_date.date().toString("yyyy-MM-dd") if self.end_date.date() != self.start_date.date() else ""
+        e.start_date = cal.format(start) if start is not None else ""
+        e.end_date = cal.format(end) if end is not None and end != start else ""
         e.texts = [self.texts_list.item(i).text() for i in range(self.texts_list.count())]
-        e.images = [self.images_list.item(i).text() for i in range(self.images_list.count())]
+        e.images = [self.images_list.item(i).toolTip() for i in range(self.images_list.count())]
         e.characters = [self.char_list.item(i).text() for i in range(self.char_list.count()) if self.char_list.item(i).isSelected()]
         e.places = [self.place_list.item(i).text() for i in range(self.place_list.count()) if self.place_list.item(i).isSelected()]
-        self.list.item(row).setText(e.title)
+        self.list.setText(row, e.title)
+        if asdict(e) != asdict(before):
+            self.record_changed.emit(before, e, row)
 
     def _clear_details(self):
         self.title_edit.clear()
         self.desc_edit.clear()
-        self.start_date.setDate(QDate.currentDate())
-        self.end_date.setDate(QDate.currentDate())
+        self.start_date.clear()
+        self.end_date.clear()
         self.texts_list.clear()
         self.images_list.clear()
         self._refresh_char_place_lists()
@@ -591,21 +724,24 @@ class EventsTab(QWidget):
         title, ok = QInputDialog.getText(self, "Add Event", "Event title?")
         if not ok or not title.strip():
             return
-        if any(e.title.lower() == title.strip().lower() for e in self.events):
+        if self.filter_edit.find_row(title) >= 0:
             QMessageBox.warning(self, "Duplicate", "Event already exists.")
             return
         e = Event(title=title.strip())
         self.events.append(e)
-        self.list.addItem(QListWidgetItem(e.title))
+        self.record_changed.emit(None, e, len(self.events) - 1)
+        self.list.addItem(e.title)
         self.list.setCurrentRow(self.list.count() - 1)
 
     def _delete_selected(self):
         row = self.list.currentRow()
         if row < 0 or row >= len(self.events):
             return
-        self.events.pop(row)
+        # Take the row first: that moves the current row, and the form loads the record there right away
         self.list.takeItem(row)
+        removed = self.events.pop(row)
         self.list.setCurrentRow(0 if self.events else -1)
+        self.record_changed.emit(removed, None, row)
 
     def _add_text(self):
         text, ok = QInputDialog.getMultiLineText(self, "Add Note", "Text:")
@@ -622,16 +758,13 @@ class EventsTab(QWidget):
             os.makedirs(folder, exist_ok=True)
         file, _ = QFileDialog.getOpenFileName(self, "Select Image", folder, "Images (*.png *.jpg *.jpeg *.bmp *.gif);;All Files (*)")
         if file:
-            rel = os.path.relpath(file, os.getcwd())
-            if not rel.startswith("pictures/") and not rel.startswith("pictures\\"):
-                QMessageBox.warning(self, "Not in pictures/", "Please only add images from the 'pictures/' folder.")
+            try:
+                ref = default_store().import_file(file)
+            except OSError as e:
+                QMessageBox.warning(self, "Import failed", f"Could not import image: {e}")
                 return
-            self.images_list.addItem(QListWidgetItem(rel))
+            _add_image_item(self.images_list, ref)
 
     def _del_img(self):
         for item in self.images_list.selectedItems():
             self.images_list.takeItem(self.images_list.row(item))
-
-    def values(self) -> List[Event]:
-        self._save_current()
-        return self.events
\ No newline at end of file
@@ -0,0 +1,41 @@
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Callable, Hashable, Tuple
+from PySide6.QtGui import QPixmap
+
+def _size(pixmap: QPixmap) -> int:
+    return pixmap.width() * pixmap.height() * max(1, pixmap.depth()) // 8
+
+class TileCache:
+    """
+    Least-recently-used cache of pre-rendered QPixmap tiles, bounded by the
+    total size of their pixel data in bytes. Keys are tuples chosen by the
+    caller (layer, zoom, data version, tile position, ...).
+    """
+    def __init__(self, budget: int = 32 * 1024 * 1024):
+        self.budget = budget
+        self.used = 0
+        self._tiles: "OrderedDict[Hashable, Tuple[QPixmap, int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._tiles)
+
+    def get(self, key: Hashable, render: Callable[[], QPixmap]) -> QPixmap:
+        """The tile for key, rendering (and caching) it first if needed."""
+        entry = self._tiles.get(key)
+        if entry is not None:
+            self._tiles.move_to_end(key)
+            return entry[0]
+        pixmap = render()
+        size = _size(pixmap)
+        self._tiles[key] = (pixmap, size)
+        self.used += size
+        # Never evict the tile just made, even if it alone is over budget
+        while self.used > self.budget and len(self._tiles) > 1:
+            _, (_, old) = self._tiles.popitem(last=False)
+            self.used -= old
+        return pixmap
+
+    def clear(self):
+        self._tiles.clear()
+        self.used = 0
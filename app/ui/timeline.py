@@ -1,17 +1,25 @@
 from __future__ import annotations
-from typing import List, Dict, Tuple
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QGraphicsView, QGraphicsScene, QLabel, QHBoxLayout, QPushButton
-from PySide6.QtGui import QColor, QPen, QBrush, QFont, QPainter
-from PySide6.QtCore import Qt, QRectF
+import math
+from collections import Counter
+from typing import List, Dict, Optional, Tuple
+import numpy as np
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QGraphicsView, QGraphicsScene, QLabel, QHBoxLayout, QPushButton, QLineEdit
+from PySide6.QtGui import QColor, QPen, QBrush, QFont, QPainter, QImage, QPixmap
+from PySide6.QtCore import Qt, QPointF, QRectF, Signal
+from ..calendars import current
 from ..models import Event, Character
-
-def _date_key(s: str) -> str:
-    return s if s else "9999-99-99"
+from ..query import EventIndex, Query, parse_query
+from .tiles import TileCache
 
 class TimelineGraphWidget(QGraphicsView):
     """
     Shows a graphical timeline with one swimlane per character, colored by character color.
     Events are shown as rectangles at their date, per involved character.
+
+    Only events are scene items. The static layers (lane lines, character names,
+    date ticks and labels) are painted from pre-rendered tiles, cached by zoom
+    and data version, in drawBackground/drawForeground; names and dates are
+    pinned to the left and top edges while scrolling.
     """
     ROW_HEIGHT = 50  # px per character lane
     LEFT_MARGIN = 120  # px space for character names
@@ -19,6 +27,11 @@ class TimelineGraphWidget(QGraphicsView):
     LANE_PADDING = 10  # px vertical padding per lane
     EVENT_WIDTH = 20   # px width for event marker on timeline
     EVENT_HEIGHT = 24  # px height for event marker
+    TILE = 256  # px (scene units) per side of a cached tile
+    HEADER_HEIGHT = TOP_MARGIN - 6  # date row pinned to the top
+    LABEL_WIDTH = 200  # px a date label may extend right of its tick
+
+    rendered = Signal()
 
     def __init__(self, get_events_fn, get_characters_fn, parent=None):
         super().__init__(parent)
@@ -30,91 +43,457 @@ class TimelineGraphWidget(QGraphicsView):
         self.setMinimumWidth(800)
         self._font = QFont()
         self._font.setPointSize(10)
+        self.query: Optional[Query] = None
+        self.index: Optional[EventIndex] = None
+        self.shown_count = 0
+        # Day numbers of the drawn dates and their scene x, for mapping between the two
+        self.axis_days = np.zeros(0)
+        self.axis_x = np.zeros(0)
+        # What the last full render drew, so single edits can be redrawn in place (see update_event)
+        self._row_by_name: Dict[str, int] = {}
+        self._char_by_name: Dict[str, Character] = {}
+        self._event_items: Dict[str, list] = {}  # lowercased title -> scene items
+        self._day_events: Counter = Counter()  # start day -> number of drawn events
+        self._stale = False  # index no longer matches the events after in-place updates
+        # Static layers: drawn from tiles, re-rendered only when data_version changes
+        self.tiles = TileCache()
+        self.data_version = 0
+        self._layers_key = None
+        self._lanes: List[Tuple[str, str]] = []  # (name, color) per row
+        self._date_labels: List[str] = []
+        self._lane_end = 0.0
+        # Pinned headers are drawn at the viewport's edge, so scrolling must repaint, not blit
+        self.setViewportUpdateMode(QGraphicsView.FullViewportUpdate)
 
     def refresh(self):
+        # Rebuild the query indexes from the current data, then draw
+        self.index = EventIndex(self.get_events_fn())
+        self._stale = False
+        self._render()
+
+    def set_query(self, query: Optional[Query]):
+        """Show only events matching query (None shows everything), reusing the indexes."""
+        self.query = query
+        if self.index is None or self._stale:
+            self.refresh()
+        else:
+            self._render()
+
+    def update_event(self, before: Optional[Event], after: Optional[Event]):
+        """
+        Redraw a single added/removed/edited event. Falls back to a full refresh when
+        the edit changes the date axis or a filter is active.
+        """
+        if self.index is None:
+            return
+        self._stale = True
+        cal = current()
+        old_day = cal.parse(before.start_date) if before is not None else None
+        new_day = cal.parse(after.start_date) if after is not None else None
+        old_key = before.title.lower() if before is not None else None
+        if self.query is not None or (old_key is not None and old_day is not None and old_key not in self._event_items):
+            self.refresh()
+            return
+        days = self._day_events.copy()
+        if old_day is not None:
+            days[old_day] -= 1
+        if new_day is not None:
+            days[new_day] += 1
+        days = +days
+        if set(days) != set(self._day_events):
+            self.refresh()  # a date appears on or leaves the axis
+            return
+        self._day_events = days
+        for item in self._event_items.pop(old_key, []):
+            self.scene().removeItem(item)
+        if new_day is not None:
+            x = float(self.axis_x[np.searchsorted(self.axis_days, new_day)])
+            self._event_items[after.title.lower()] = self._draw_event(after, x)
+        self.rendered.emit()
+
+    def _render(self):
         # Gather data
-        events: List[Event] = self.get_events_fn()
         characters: List[Character] = self.get_characters_fn()
+        index = self.index
+        if self.query is None:
+            shown = np.arange(len(index.events))
+        else:
+            shown = np.array(sorted(self.query.evaluate(index)), dtype=np.intp)
+            # Only keep lanes for characters that take part in the matching events
+            involved = {cn for i in shown for cn in index.events[i].characters}
+            characters = [c for c in characters if c.name in involved]
+        self.shown_count = len(shown)
         char_by_name: Dict[str, Character] = {c.name: c for c in characters}
+        row_by_name: Dict[str, int] = {}
+        for i, c in enumerate(characters):
+            row_by_name.setdefault(c.name, i)
 
-        # Get all event dates for sorting X axis
-        event_dates = []
-        for ev in events:
-            if getattr(ev, "start_date", ""):
-                event_dates.append(ev.start_date)
-        event_dates = sorted(set(event_dates))
-        if not event_dates:
+        # Distinct start days (integers from the index) make up the X axis, in order
+        shown = shown[index.dated[shown]]
+        event_days = np.unique(index.start_days[shown])
+        if not event_days.size:
             self.scene().clear()
+            self._event_items, self._day_events = {}, Counter()
+            self.axis_days = self.axis_x = np.zeros(0)
+            self._set_layers([], event_days, 0)
+            self.rendered.emit()
             return
 
-        # Map: date -> x position
-        n_dates = len(event_dates)
+        # Map: day -> x position
+        n_dates = len(event_days)
         timeline_width = max(600, n_dates * 90)
-        date_x: Dict[str, float] = {
-            date: self.LEFT_MARGIN + i * (timeline_width // max(1, n_dates-1))
-            for i, date in enumerate(event_dates)
-        }
+        axis_x = self.LEFT_MARGIN + np.arange(n_dates) * (timeline_width // max(1, n_dates-1))
+        event_x = axis_x[np.searchsorted(event_days, index.start_days[shown])]
 
-        # Paint
+        # Paint: lanes, names and dates come from the tile layers, only events are items
         self.scene().clear()
-        # Draw date labels
-        for date, x in date_x.items():
-            self.scene().addLine(x, self.TOP_MARGIN-12, x, self.TOP_MARGIN-6, QPen(Qt.gray, 1))
-            txt = self.scene().addText(date, self._font)
-            txt.setPos(x-22, self.TOP_MARGIN-30)
-
-        # Draw character lanes
-        for row, c in enumerate(characters):
-            y = self.TOP_MARGIN + row * self.ROW_HEIGHT
-            # Lane line
-            col = QColor(c.color)
-            pen = QPen(col, 3)
-            self.scene().addLine(self.LEFT_MARGIN, y, timeline_width+self.LEFT_MARGIN-30, y, pen)
-            # Character label
-            label = self.scene().addText(c.name, self._font)
-            label.setDefaultTextColor(col)
-            label.setPos(10, y - self.EVENT_HEIGHT // 2)
+        self.axis_days = event_days.astype(float)
+        self.axis_x = axis_x.astype(float)
+        self._set_layers(characters, event_days, timeline_width)
         # Draw events
-        for ev in events:
-            if not getattr(ev, "start_date", ""):
-                continue
-            x = date_x.get(ev.start_date)
-            if x is None:
-                continue
-            for cn in getattr(ev, "characters", []):
-                crow = [i for i, c in enumerate(characters) if c.name == cn]
-                if not crow:
-                    continue
-                row = crow[0]
-                y = self.TOP_MARGIN + row * self.ROW_HEIGHT
-                col = QColor(char_by_name[cn].color if cn in char_by_name else "#999")
-                rect = QRectF(x - self.EVENT_WIDTH/2, y - self.EVENT_HEIGHT/2, self.EVENT_WIDTH, self.EVENT_HEIGHT)
-                self.scene().addRect(rect, QPen(Qt.black, 1), QBrush(col.lighter(120)))
-                # Event title (only for first character per event, to avoid repetition)
-                if cn == ev.characters[0]:
-                    txt = self.scene().addText(ev.title, self._font)
-                    txt.setDefaultTextColor(Qt.black)
-                    txt.setPos(x + 4, y - self.EVENT_HEIGHT)
+        self._row_by_name, self._char_by_name = row_by_name, char_by_name
+        self._event_items = {}
+        for i, x in zip(shown.tolist(), event_x.tolist()):
+            ev = index.events[i]
+            self._event_items[ev.title.lower()] = self._draw_event(ev, x)
+        self._day_events = Counter(index.start_days[shown].tolist())
         # Adjust scene size
         self.setSceneRect(0, 0, timeline_width+self.LEFT_MARGIN, self.TOP_MARGIN + len(characters)*self.ROW_HEIGHT + 40)
+        self.rendered.emit()
+
+    def _set_layers(self, characters: List[Character], event_days: np.ndarray, timeline_width: int):
+        """Bump data_version (dropping the cached tiles) if lanes, colors or the date axis changed."""
+        cal = current()
+        lanes = [(c.name, c.color) for c in characters]
+        key = (lanes, event_days.tolist(), timeline_width, cal.spec())
+        if key == self._layers_key:
+            return
+        self._layers_key = key
+        self.data_version += 1
+        self.tiles.clear()
+        self._lanes = lanes
+        self._date_labels = [cal.label(day) for day in event_days.tolist()]
+        self._lane_end = timeline_width + self.LEFT_MARGIN - 30
+        self.viewport().update()
+
+    # --- Static layers ----------------------------------------------------------
+
+    def _zoom(self) -> Tuple[float, float]:
+        t = self.transform()
+        dpr = self.devicePixelRatioF()
+        return round(t.m11() * dpr, 4), round(t.m22() * dpr, 4)
+
+    def _tile(self, layer: str, rect: QRectF, paint) -> QPixmap:
+        """Cached pixmap of rect (scene units) of a layer at the current zoom."""
+        zoom = self._zoom()
+        key = (layer, zoom, self.data_version, rect.left(), rect.top(), rect.width(), rect.height())
+
+        def render():
+            pixmap = QPixmap(max(1, math.ceil(rect.width() * zoom[0])), max(1, math.ceil(rect.height() * zoom[1])))
+            pixmap.fill(Qt.transparent)
+            painter = QPainter(pixmap)
+            painter.setRenderHint(QPainter.Antialiasing)
+            painter.setRenderHint(QPainter.TextAntialiasing)
+            painter.scale(*zoom)
+            painter.translate(-rect.left(), -rect.top())
+            painter.setFont(self._font)
+            paint(painter, rect)
+            painter.end()
+            return pixmap
+        return self.tiles.get(key, render)
+
+    def _rows_in(self, top: float, bottom: float) -> range:
+        pad = self.ROW_HEIGHT / 2
+        first = max(0, math.floor((top - pad - self.TOP_MARGIN) / self.ROW_HEIGHT))
+        last = min(len(self._lanes) - 1, math.ceil((bottom + pad - self.TOP_MARGIN) / self.ROW_HEIGHT))
+        return range(first, last + 1)
+
+    def _paint_lanes(self, painter: QPainter, rect: QRectF):
+        for row in self._rows_in(rect.top(), rect.bottom()):
+            y = self.TOP_MARGIN + row * self.ROW_HEIGHT
+            painter.setPen(QPen(QColor(self._lanes[row][1]), 3))
+            painter.drawLine(QPointF(self.LEFT_MARGIN, y), QPointF(self._lane_end, y))
+
+    def _paint_names(self, painter: QPainter, rect: QRectF):
+        for row in self._rows_in(rect.top(), rect.bottom()):
+            name, color = self._lanes[row]
+            y = self.TOP_MARGIN + row * self.ROW_HEIGHT
+            painter.setPen(QColor(color))
+            box = QRectF(14, y - self.EVENT_HEIGHT / 2, self.LEFT_MARGIN - 16, self.EVENT_HEIGHT)
+            painter.drawText(box, Qt.AlignLeft | Qt.AlignVCenter, name)
+
+    def _paint_dates(self, painter: QPainter, rect: QRectF):
+        lo = np.searchsorted(self.axis_x, rect.left() - self.LABEL_WIDTH)
+        hi = np.searchsorted(self.axis_x, rect.right() + 30, "right")
+        for x, label in zip(self.axis_x[lo:hi].tolist(), self._date_labels[lo:hi]):
+            painter.setPen(QPen(Qt.gray, 1))
+            painter.drawLine(QPointF(x, self.TOP_MARGIN - 12), QPointF(x, self.TOP_MARGIN - 6))
+            painter.setPen(Qt.black)
+            painter.drawText(QRectF(x - 18, self.TOP_MARGIN - 26, self.LABEL_WIDTH, 18), Qt.AlignLeft | Qt.AlignVCenter, label)
+
+    def drawBackground(self, painter, rect):
+        super().drawBackground(painter, rect)
+        if not self._lanes:
+            return
+        size = self.TILE
+        area = rect.intersected(self.sceneRect())
+        for tx in range(math.floor(area.left() / size), math.ceil(area.right() / size)):
+            for ty in range(math.floor(area.top() / size), math.ceil(area.bottom() / size)):
+                tile = QRectF(tx * size, ty * size, size, size)
+                pixmap = self._tile("lanes", tile, self._paint_lanes)
+                painter.drawPixmap(tile, pixmap, QRectF(pixmap.rect()))
+
+    def drawForeground(self, painter, rect):
+        super().drawForeground(painter, rect)
+        if not self.axis_x.size:
+            return
+        size = self.TILE
+        view = self.mapToScene(self.viewport().rect()).boundingRect()
+        # Pinned headers: the content is fixed, only where it is drawn follows the scroll position
+        left, top = max(0.0, view.left()), max(0.0, view.top())
+        if left > 0:
+            painter.fillRect(QRectF(left, view.top(), self.LEFT_MARGIN - 2, view.height()), Qt.white)
+        for ty in range(max(0, math.floor(view.top() / size)), math.ceil(view.bottom() / size)):
+            tile = QRectF(0, ty * size, self.LEFT_MARGIN, size)
+            pixmap = self._tile("names", tile, self._paint_names)
+            painter.drawPixmap(tile.translated(left, 0), pixmap, QRectF(pixmap.rect()))
+        if top > 0:
+            painter.fillRect(QRectF(view.left(), top, view.width(), self.HEADER_HEIGHT), Qt.white)
+        for tx in range(max(0, math.floor(view.left() / size)), math.ceil(view.right() / size)):
+            tile = QRectF(tx * size, 0, size, self.HEADER_HEIGHT)
+            pixmap = self._tile("dates", tile, self._paint_dates)
+            painter.drawPixmap(tile.translated(0, top), pixmap, QRectF(pixmap.rect()))
+
+    def _draw_event(self, ev: Event, x: float) -> list:
+        items = []
+        for cn in getattr(ev, "characters", []):
+            row = self._row_by_name.get(cn)
+            if row is None:
+                continue
+            y = self.TOP_MARGIN + row * self.ROW_HEIGHT
+            col = QColor(self._char_by_name[cn].color if cn in self._char_by_name else "#999")
+            rect = QRectF(x - self.EVENT_WIDTH/2, y - self.EVENT_HEIGHT/2, self.EVENT_WIDTH, self.EVENT_HEIGHT)
+            items.append(self.scene().addRect(rect, QPen(Qt.black, 1), QBrush(col.lighter(120))))
+            # Event title (only for first character per event, to avoid repetition)
+            if cn == ev.characters[0]:
+                txt = self.scene().addText(ev.title, self._font)
+                txt.setDefaultTextColor(Qt.black)
+                txt.setPos(x + 4, y - self.EVENT_HEIGHT)
+                items.append(txt)
+        return items
+
+    def visible_days(self) -> Optional[Tuple[float, float]]:
+        """Day-number range currently scrolled into view."""
+        if not self.axis_days.size:
+            return None
+        rect = self.mapToScene(self.viewport().rect()).boundingRect()
+        lo, hi = np.interp([rect.left(), rect.right()], self.axis_x, self.axis_days)
+        return float(lo), float(hi)
+
+    def scroll_to_day(self, day: float):
+        if not self.axis_days.size:
+            return
+        x = float(np.interp(day, self.axis_days, self.axis_x))
+        center = self.mapToScene(self.viewport().rect().center())
+        self.centerOn(x, center.y())
+
+class TimelineMinimap(QWidget):
+    """
+    Overview strip above the timeline: event density per character lane over the
+    whole time span, with the graph's visible range drawn as a draggable box.
+
+    Events are kept as (lane, day) counts; binning them to the strip's width is a
+    single np.bincount, so repaints don't depend on the number of scene items.
+    """
+    LANE_PX = 6
+    MAX_HEIGHT = 90
+
+    def __init__(self, graph: TimelineGraphWidget, parent=None):
+        super().__init__(parent)
+        self.graph = graph
+        self.lanes: Dict[str, int] = {}
+        self._lane_key: List[Tuple[str, str]] = []
+        self.colors = np.zeros((0, 3))
+        self._points: Counter = Counter()  # (lane, day) -> number of events
+        self._span: Optional[Tuple[int, int]] = None
+        self._counts = np.zeros((0, 0))
+        self._image: Optional[QImage] = None
+        self.setMinimumHeight(self.LANE_PX * 2)
+        self.setMaximumHeight(self.MAX_HEIGHT)
+        self.setCursor(Qt.PointingHandCursor)
+        graph.horizontalScrollBar().valueChanged.connect(lambda _value: self.update())
+        graph.rendered.connect(self.update)
+
+    def set_characters(self, characters: List[Character], events: List[Event]):
+        """Rebuild if the lanes (names or colors) changed, otherwise do nothing."""
+        if self._lane_key != [(c.name, c.color) for c in characters]:
+            self.set_events(events, characters)
+
+    def set_events(self, events: List[Event], characters: List[Character]):
+        """Rebuild from scratch (new characters or first load)."""
+        self._lane_key = [(c.name, c.color) for c in characters]
+        self.lanes = {}
+        for c in characters:
+            self.lanes.setdefault(c.name, len(self.lanes))
+        self.colors = np.array([QColor(c.color).darker(140).getRgb()[:3] for c in characters], dtype=float).reshape(-1, 3)
+        self._points = Counter()
+        days, dated = current().parse_many(ev.start_date for ev in events)
+        for ev, d, ok in zip(events, days.tolist(), dated.tolist()):
+            if ok:
+                self._add(ev, 1, d)
+        self.setFixedHeight(min(self.MAX_HEIGHT, max(2, len(self.lanes)) * self.LANE_PX))
+        self._rebin()
+
+    def update_event(self, before: Optional[Event], after: Optional[Event]):
+        """Apply one event edit, re-binning only if it falls outside the current span."""
+        changed = []
+        if before is not None:
+            changed += self._add(before, -1)
+        if after is not None:
+            changed += self._add(after, 1)
+        if not changed:
+            return
+        if self._span is None or not self._points:
+            self._rebin()
+            return
+        lo, hi = self._span
+        # Rebin only if the span grows, or may shrink because something at its edge went away
+        if any(not lo <= d <= hi or (sign < 0 and d in (lo, hi)) for _, d, sign in changed):
+            self._rebin()
+            return
+        for lane, d, sign in changed:
+            self._counts[lane, self._bin(d)] += sign
+        self._render()
+
+    def _add(self, ev: Event, sign: int, d: Optional[int] = None):
+        if d is None:
+            d = current().parse(ev.start_date)
+            if d is None:
+                return []
+        out = []
+        for cn in dict.fromkeys(ev.characters):
+            lane = self.lanes.get(cn)
+            if lane is None:
+                continue
+            self._points[(lane, d)] += sign
+            if self._points[(lane, d)] <= 0:
+                del self._points[(lane, d)]
+            out.append((lane, d, sign))
+        return out
+
+    def _bin(self, day: float) -> int:
+        lo, hi = self._span
+        n = self._counts.shape[1]
+        return min(n - 1, int((day - lo) * n / max(1, hi - lo)))
+
+    def _rebin(self):
+        bins = max(1, self.width())
+        self._counts = np.zeros((len(self.lanes), bins))
+        if not self._points:
+            self._span = None
+            self._render()
+            return
+        keys = np.array(list(self._points.keys()), dtype=np.int64)
+        weights = np.fromiter(self._points.values(), dtype=float, count=len(self._points))
+        lanes, days = keys[:, 0], keys[:, 1]
+        lo, hi = int(days.min()), int(days.max())
+        self._span = (lo, hi)
+        cols = np.minimum(bins - 1, (days - lo) * bins // max(1, hi - lo))
+        flat = np.bincount(lanes * bins + cols, weights=weights, minlength=len(self.lanes) * bins)
+        self._counts = flat.reshape(len(self.lanes), bins)
+        self._render()
+
+    def _render(self):
+        if not self._counts.size:
+            self._image = None
+            self.update()
+            return
+        # Square-root scaling keeps sparse lanes visible next to busy ones
+        level = np.sqrt(self._counts / max(1.0, self._counts.max()))[:, :, None]
+        rgb = 255 - (255 - self.colors[:, None, :]) * level
+        rgba = np.empty(self._counts.shape + (4,), dtype=np.uint8)
+        rgba[..., :3] = rgb.astype(np.uint8)
+        rgba[..., 3] = 255
+        h, w = self._counts.shape
+        # copy() so the image owns its pixels instead of pointing into the numpy buffer
+        self._image = QImage(rgba.tobytes(), w, h, 4 * w, QImage.Format_RGBA8888).copy()
+        self.update()
+
+    def _day_at(self, x: float) -> Optional[float]:
+        if self._span is None:
+            return None
+        lo, hi = self._span
+        return lo + (hi - lo) * x / max(1, self.width())
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._rebin()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.white)
+        if self._image is not None:
+            painter.drawImage(self.rect(), self._image)
+        visible = self.graph.visible_days()
+        if self._span is not None and visible is not None:
+            lo, hi = self._span
+            scale = self.width() / max(1, hi - lo)
+            x0, x1 = (visible[0] - lo) * scale, (visible[1] - lo) * scale
+            painter.setPen(QPen(QColor("#1e64c8"), 2))
+            painter.setBrush(QColor(30, 100, 200, 40))
+            painter.drawRect(QRectF(x0, 1, max(4, x1 - x0), self.height() - 2))
+        painter.end()
+
+    def mousePressEvent(self, event):
+        self.mouseMoveEvent(event)
+
+    def mouseMoveEvent(self, event):
+        day = self._day_at(event.position().x())
+        if day is not None:
+            self.graph.scroll_to_day(day)
 
 class TimelineTab(QWidget):
     """
-    Tab containing the graphical timeline and a refresh button.
+    Tab containing the graphical timeline, a filter bar and a refresh button.
     """
     def __init__(self, get_events_fn, get_characters_fn):
         super().__init__()
         self.graph = TimelineGraphWidget(get_events_fn, get_characters_fn)
+        self.minimap = TimelineMinimap(self.graph)
         self.refresh_btn = QPushButton("Refresh")
-        self.refresh_btn.clicked.connect(self.graph.refresh)
+        self.refresh_btn.clicked.connect(self.refresh)
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("Filter, e.g. char:mikael place:karlskrona year:2025   (or, not, -term, \"text\")")
+        self.filter_edit.setClearButtonEnabled(True)
+        self.filter_edit.textChanged.connect(self._apply_filter)
+        self.count_label = QLabel()
 
         top = QHBoxLayout()
-        top.addStretch(1)
+        top.addWidget(self.filter_edit, 1)
+        top.addWidget(self.count_label)
         top.addWidget(self.refresh_btn)
         layout = QVBoxLayout(self)
         layout.addLayout(top)
+        layout.addWidget(self.minimap)
         layout.addWidget(self.graph)
         # Initial draw
-        self.graph.refresh()
+        self.refresh()
+
+    def _apply_filter(self, text: str):
+        try:
+            query = parse_query(text) if text.strip() else None
+        except ValueError:
+            return  # e.g. an unclosed quote while typing; keep the previous view
+        self.graph.set_query(query)
+        self._update_count()
+
+    def _update_count(self):
+        if self.graph.query is None:
+            self.count_label.setText("")
+        else:
+            self.count_label.setText(f"{self.graph.shown_count} of {len(self.graph.index.events)} events")
+
     def refresh(self):
-        self.graph.refresh()
\ No newline at end of file
+        self.graph.refresh()
+        self.minimap.set_events(self.graph.index.events, self.graph.get_characters_fn())
+        self._update_count()